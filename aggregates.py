@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Streaming per-TLD aggregates
+Updates mergeable counts, sums and quantile sketches per TLD as pages are
+parsed, so a crawl produces its summary report without a second pass
+"""
+
+import argparse
+import json
+import math
+import threading
+from records import parse_number
+from config import AGGREGATE_REPORT_FILE, SKETCH_RELATIVE_ACCURACY
+
+# Numeric fields summarized per TLD
+METRIC_FIELDS = ('current_bid', 'revenue', 'visitors')
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error
+
+    Values are counted in logarithmic buckets (as in DDSketch), so any
+    quantile is within the relative accuracy and two sketches merge by
+    adding bucket counts. Zero and negative values share one bucket.
+    """
+
+    def __init__(self, relative_accuracy=None):
+        self.relative_accuracy = relative_accuracy or SKETCH_RELATIVE_ACCURACY
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}  # bucket index -> count
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        """Add one value"""
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        """Add another sketch's counts into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0-1), or None when empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        return sketch
+
+
+class TLDStats:
+    """Mergeable aggregates for one TLD"""
+
+    def __init__(self):
+        self.count = 0
+        self.with_bids = 0
+        self.sums = {field: 0.0 for field in METRIC_FIELDS}
+        self.sketches = {field: QuantileSketch() for field in METRIC_FIELDS}
+
+    def add(self, record):
+        """Add one domain record"""
+        self.count += 1
+        bids = parse_number(record.get('bids_count'))
+        if bids:
+            self.with_bids += 1
+        for field in METRIC_FIELDS:
+            value = parse_number(record.get(field))
+            if value is not None:
+                self.sums[field] += value
+                self.sketches[field].add(value)
+
+    def merge(self, other):
+        """Add another TLD's aggregates into this one"""
+        self.count += other.count
+        self.with_bids += other.with_bids
+        for field in METRIC_FIELDS:
+            self.sums[field] += other.sums[field]
+            self.sketches[field].merge(other.sketches[field])
+
+    def summary(self):
+        """Human-readable summary of this TLD"""
+        summary = {
+            'count': self.count,
+            'share_with_bids': round(self.with_bids / self.count, 4) if self.count else 0.0,
+        }
+        for field in METRIC_FIELDS:
+            sketch = self.sketches[field]
+            field_summary = {
+                'values': sketch.count,
+                'sum': round(self.sums[field], 2),
+                'mean': round(self.sums[field] / sketch.count, 2) if sketch.count else None,
+            }
+            for q in QUANTILES:
+                value = sketch.quantile(q)
+                field_summary[f"p{int(q * 100)}"] = round(value, 2) if value is not None else None
+            summary[field] = field_summary
+        return summary
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'with_bids': self.with_bids,
+            'sums': self.sums,
+            'sketches': {field: sketch.to_dict() for field, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.with_bids = data['with_bids']
+        stats.sums = dict(data['sums'])
+        stats.sketches = {field: QuantileSketch.from_dict(sketch) for field, sketch in data['sketches'].items()}
+        return stats
+
+
+class TLDAggregator:
+    """Per-TLD aggregates updated as each page is parsed
+
+    add_page matches the on_page(offset, domains) callback signature.
+    """
+
+    def __init__(self):
+        self.tlds = {}
+        self.pages = 0
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        """Add one domain record"""
+        stats = self.tlds.get(record.get('tld'))
+        if stats is None:
+            stats = self.tlds[record.get('tld')] = TLDStats()
+        stats.add(record)
+
+    def add_page(self, offset, domains):
+        """Add every record of a parsed page"""
+        with self.lock:
+            self.pages += 1
+            for record in domains:
+                self.add(record)
+
+    def merge(self, other):
+        """Add another aggregator's (shard's) state into this one"""
+        with self.lock:
+            self.pages += other.pages
+            for tld, stats in other.tlds.items():
+                if tld in self.tlds:
+                    self.tlds[tld].merge(stats)
+                else:
+                    self.tlds[tld] = TLDStats.from_dict(stats.to_dict())
+
+    def summary(self):
+        """Per-TLD summary, largest TLDs first"""
+        ordered = sorted(self.tlds.items(), key=lambda item: (-item[1].count, item[0]))
+        return {tld: stats.summary() for tld, stats in ordered}
+
+    def to_dict(self):
+        return {'pages': self.pages, 'tlds': {tld: stats.to_dict() for tld, stats in self.tlds.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls()
+        aggregator.pages = data['pages']
+        aggregator.tlds = {tld: TLDStats.from_dict(stats) for tld, stats in data['tlds'].items()}
+        return aggregator
+
+    def save(self, filename=None):
+        """Write the summary report along with the mergeable state"""
+        filename = filename or AGGREGATE_REPORT_FILE
+        with self.lock:
+            report = {'summary': self.summary(), 'state': self.to_dict()}
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"TLD summary written to: {filename}")
+        return filename
+
+    @classmethod
+    def load(cls, filename):
+        """Load an aggregator from a saved report"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f)['state'])
+
+
+def main():
+    """Merge per-shard TLD reports into one"""
+    parser = argparse.ArgumentParser(description="Merge per-TLD aggregate reports from several shards")
+    parser.add_argument('output', help="merged report file")
+    parser.add_argument('reports', nargs='+', help="shard report files")
+    args = parser.parse_args()
+
+    merged = TLDAggregator()
+    for filename in args.reports:
+        merged.merge(TLDAggregator.load(filename))
+    merged.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
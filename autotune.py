@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Throughput autotuner for the Porkbun auction scraper
+Runs short calibration crawls sweeping worker count and request rate,
+measures goodput and error/throttle rates, and writes a recommended
+profile that the scraper loads at start
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from rate_limiter import RateLimiter
+from config import (
+    BASE_URL, DOMAINS_PER_PAGE, RETRY_DELAY, AUTOTUNE_PROFILE_FILE, AUTOTUNE_WORKERS, AUTOTUNE_RATES,
+    AUTOTUNE_PAGES, AUTOTUNE_MAX_ERROR_RATE, AUTOTUNE_COOLDOWN
+)
+
+# Responses that mean the server wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+def load_profile(base_url=None, filename=None):
+    """Recommended settings for base_url, or {} when there is no matching profile"""
+    filename = filename or AUTOTUNE_PROFILE_FILE
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Warning: Could not load tuning profile: {e}")
+        return {}
+    if profile.get('base_url') != (base_url or BASE_URL):
+        return {}
+    return profile.get('recommended', {})
+
+
+def run_trial(scraper, workers, rate, pages):
+    """Fetch and parse `pages` pages with the given concurrency and rate, without retries"""
+    limiter = RateLimiter(rate)
+    retry_after = []
+
+    def fetch(offset):
+        url = scraper._build_url(offset)
+        limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = scraper.session.get(url, timeout=30)
+        except requests.exceptions.RequestException:
+            return 'error', time.perf_counter() - start, 0
+        latency = time.perf_counter() - start
+        if response.status_code in THROTTLE_STATUSES:
+            if response.headers.get('Retry-After', '').isdigit():
+                retry_after.append(int(response.headers['Retry-After']))
+            return 'throttled', latency, 0
+        if not response.ok:
+            return 'error', latency, 0
+        domains, _ = scraper._parse_page(response, url)
+        return ('ok' if domains else 'empty'), latency, len(domains)
+
+    offsets = [page * DOMAINS_PER_PAGE for page in range(pages)]
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, offsets))
+    elapsed = time.monotonic() - start
+
+    outcomes = [outcome for outcome, _, _ in results]
+    ok = outcomes.count('ok')
+    failed = outcomes.count('throttled') + outcomes.count('error')
+    return {
+        'workers': workers,
+        'rate': rate,
+        'pages': len(results),
+        'ok': ok,
+        'empty': outcomes.count('empty'),
+        'throttled': outcomes.count('throttled'),
+        'errors': outcomes.count('error'),
+        'error_rate': round(failed / len(results), 4) if results else 0.0,
+        'goodput_pages_per_second': round(ok / elapsed, 3) if elapsed else 0.0,
+        'rows_per_second': round(sum(rows for _, _, rows in results) / elapsed, 1) if elapsed else 0.0,
+        'median_latency': round(statistics.median(latency for _, latency, _ in results), 3) if results else None,
+        'retry_after': max(retry_after) if retry_after else None,
+        'elapsed_seconds': round(elapsed, 3),
+    }
+
+
+def recommend(trials, max_error_rate=None):
+    """Pick the trial with the highest goodput among those within the error budget"""
+    max_error_rate = AUTOTUNE_MAX_ERROR_RATE if max_error_rate is None else max_error_rate
+    acceptable = [trial for trial in trials if trial['error_rate'] <= max_error_rate and trial['ok']]
+    if not acceptable:
+        # Nothing met the budget: fall back to the gentlest setting that was tried
+        best = min(trials, key=lambda trial: (trial['rate'], trial['workers']))
+        print(f"Warning: no setting stayed within {max_error_rate:.0%} errors; recommending the gentlest one")
+    else:
+        # Ties (e.g. latency-bound runs) go to the lower rate and fewer workers
+        best = max(acceptable, key=lambda trial: (trial['goodput_pages_per_second'], -trial['rate'], -trial['workers']))
+    recommended = {'max_workers': best['workers'], 'requests_per_second': best['rate']}
+    # Retry-After is a lower bound from the server, so it can only lengthen RETRY_DELAY
+    retry_after = [trial['retry_after'] for trial in trials if trial['retry_after']]
+    if retry_after and max(retry_after) > RETRY_DELAY:
+        recommended['retry_delay'] = float(max(retry_after))
+    return recommended
+
+
+def calibrate(base_url=None, workers=None, rates=None, pages=None, cooldown=None, **search_params):
+    """Run the calibration sweep and return the profile (not saved)"""
+    from scraper import PorkbunScraper
+    base_url = base_url or BASE_URL
+    workers = workers or AUTOTUNE_WORKERS
+    rates = rates or AUTOTUNE_RATES
+    pages = pages or AUTOTUNE_PAGES
+    cooldown = AUTOTUNE_COOLDOWN if cooldown is None else cooldown
+
+    trials = []
+    for rate in sorted(rates):
+        for worker_count in sorted(workers):
+            if trials and cooldown:
+                time.sleep(cooldown)
+            scraper = PorkbunScraper(max_workers=worker_count, fast_parse=False, base_url=base_url, **search_params)
+            trial = run_trial(scraper, worker_count, rate, pages)
+            trials.append(trial)
+            print(f"  workers={worker_count:<3} rate={rate:<5} goodput={trial['goodput_pages_per_second']} pages/s "
+                  f"errors={trial['errors']} throttled={trial['throttled']} "
+                  f"latency={trial['median_latency']}s")
+
+    return {
+        'base_url': base_url,
+        'measured_at': datetime.now().isoformat(timespec='seconds'),
+        'pages_per_trial': pages,
+        'recommended': recommend(trials),
+        'trials': trials,
+    }
+
+
+def save_profile(profile, filename=None):
+    """Write a profile where the scraper will load it"""
+    filename = filename or AUTOTUNE_PROFILE_FILE
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    print(f"Tuning profile written to: {filename}")
+    return filename
+
+
+class StandInServer:
+    """Local server replaying a saved auction page, with a request capacity
+
+    Requests beyond `capacity` per second get 429 with Retry-After, so the
+    tuner can be exercised without touching the real site.
+    """
+
+    def __init__(self, page_file, capacity=10.0, latency=0.0, port=0):
+        with open(page_file, 'rb') as f:
+            body = f.read()
+        limiter = RateLimiter(capacity, burst=2)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if not limiter.try_acquire():
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.end_headers()
+                    return
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/auctions"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="stand-in-server", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    """Calibrate and write a tuning profile"""
+    parser = argparse.ArgumentParser(description="Tune worker count and request rate for the scraper")
+    parser.add_argument('--workers', type=int, nargs='+', default=AUTOTUNE_WORKERS, help="worker counts to try")
+    parser.add_argument('--rates', type=float, nargs='+', default=AUTOTUNE_RATES, help="request rates to try")
+    parser.add_argument('--pages', type=int, default=AUTOTUNE_PAGES, help="pages per trial")
+    parser.add_argument('--cooldown', type=float, default=AUTOTUNE_COOLDOWN, help="seconds between trials")
+    parser.add_argument('--output', default=AUTOTUNE_PROFILE_FILE, help="profile file")
+    parser.add_argument('--stand-in', metavar='PAGE_FILE', default=None,
+                        help="calibrate against a local server replaying this saved page")
+    parser.add_argument('--capacity', type=float, default=10.0, help="stand-in server capacity in requests/s")
+    parser.add_argument('--latency', type=float, default=0.05, help="stand-in server response time in seconds")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        with StandInServer(args.stand_in, args.capacity, args.latency) as server:
+            print(f"Calibrating against stand-in server at {server.url}")
+            profile = calibrate(server.url, args.workers, args.rates, args.pages, args.cooldown)
+    else:
+        print(f"Calibrating against {BASE_URL}")
+        profile = calibrate(None, args.workers, args.rates, args.pages, args.cooldown)
+
+    print(f"Recommended settings: {profile['recommended']}")
+    save_profile(profile, args.output)
+    if args.stand_in:
+        print("Note: the scraper only loads profiles measured against BASE_URL")
+
+
+if __name__ == "__main__":
+    main()
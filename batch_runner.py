@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Batch runner for saved Porkbun auction searches
+Runs many searches concurrently over one connection pool and rate budget,
+fetching each distinct result page once and writing one CSV per query
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from scraper import PorkbunScraper
+from csv_writer import CSVWriter
+from rate_limiter import RateLimiter
+from row_filter import rows_scanned, past_bound
+from log_utils import get_logger
+from config import (
+    HEADERS, DOMAINS_PER_PAGE, MAX_PAGES_TO_PROCESS,
+    BATCH_MAX_WORKERS, BATCH_REQUESTS_PER_SECOND, BATCH_OUTPUT_DIR
+)
+
+logger = get_logger(__name__)
+
+
+class BatchQuery:
+    """One saved search within a batch"""
+
+    def __init__(self, name, params, scraper, writer, max_pages):
+        self.name = name
+        self.params = params
+        self.scraper = scraper
+        self.writer = writer
+        self.max_pages = max_pages
+        self.seen_domains = set()
+        self.total_known = False
+        self.pages = 0
+        self.rows_written = 0
+        self.duplicate_rows = 0
+        self.errors = 0
+
+
+class BatchRunner:
+    """Runs a list of searches under one shared session and rate limit"""
+
+    def __init__(self, queries, max_workers=None, requests_per_second=None,
+                 output_dir=None, max_pages=None):
+        self.max_workers = max_workers or BATCH_MAX_WORKERS
+        self.output_dir = output_dir or BATCH_OUTPUT_DIR
+        self.max_pages = min(max_pages or MAX_PAGES_TO_PROCESS, MAX_PAGES_TO_PROCESS)
+
+        # One connection pool sized for the worker count
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limiter = RateLimiter(requests_per_second or BATCH_REQUESTS_PER_SECOND)
+
+        self.query_specs = [self._normalize_query(query, i) for i, query in enumerate(queries)]
+        self.queries = []
+        self.page_futures = {}  # URL -> future, so identical pages are fetched once
+        self.records = {}  # domain -> record shared by every query that returned it
+        self.requests_made = 0
+        self.page_cache_hits = 0
+
+    @staticmethod
+    def _normalize_query(query, index):
+        """Accept either {'name': ..., 'params': {...}} or a bare params dict"""
+        if 'params' in query:
+            params = dict(query['params'])
+            name = query.get('name')
+        else:
+            params = dict(query)
+            name = params.pop('name', None)
+        name = name or f"query_{index + 1}"
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', name), params
+
+    def _submit(self, executor, pending, query, offset):
+        """Schedule a page for a query, reusing an identical page if already requested"""
+        url = query.scraper._build_url(offset)
+        future = self.page_futures.get(url)
+        if future is None:
+            future = executor.submit(query.scraper.scrape_page, offset)
+            self.page_futures[url] = future
+            self.requests_made += 1
+        else:
+            self.page_cache_hits += 1
+        pending.setdefault(future, []).append((query, offset))
+
+    def _handle_page(self, executor, pending, query, offset, domains, total_domains):
+        """Write a page's records for a query and plan its follow-up pages"""
+        if domains is None:
+            query.errors += 1
+            return
+        query.pages += 1
+
+        page_index = offset // DOMAINS_PER_PAGE
+        if offset == 0 and total_domains:
+            # The total gives the exact page range for this query
+            query.total_known = True
+            total_pages = min((total_domains + DOMAINS_PER_PAGE - 1) // DOMAINS_PER_PAGE, query.max_pages)
+            for next_index in range(1, total_pages):
+                self._submit(executor, pending, query, next_index * DOMAINS_PER_PAGE)
+        elif not query.total_known and rows_scanned(domains) >= DOMAINS_PER_PAGE \
+                and not past_bound(domains) and page_index + 1 < query.max_pages:
+            # No total available: walk pages until a short page (counted before filtering) or the sort bound
+            self._submit(executor, pending, query, offset + DOMAINS_PER_PAGE)
+
+        batch = []
+        for record in domains:
+            shared = self.records.get(record.domain)
+            if shared is None or shared != record:
+                self.records[record.domain] = record
+                shared = record
+            if record.domain in query.seen_domains:
+                query.duplicate_rows += 1
+                continue
+            query.seen_domains.add(record.domain)
+            batch.append(shared)
+        query.rows_written += query.writer.write_multiple_domains(batch)
+
+    def run(self):
+        """Run every query and return per-query and overall statistics"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        start_time = time.monotonic()
+        pending = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for name, params in self.query_specs:
+                    scraper = PorkbunScraper(session=self.session, rate_limiter=self.rate_limiter, **params)
+                    writer = CSVWriter(os.path.join(self.output_dir, f"{name}.csv"))
+                    writer.open()
+                    query = BatchQuery(name, params, scraper, writer, self.max_pages)
+                    self.queries.append(query)
+                    self._submit(executor, pending, query, 0)
+
+                while pending:
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            domains, total_domains = future.result()
+                        except Exception as e:
+                            logger.error("Error scraping page: %s", e, extra={'error': str(e)})
+                            domains, total_domains = None, None
+                        for query, offset in pending.pop(future):
+                            self._handle_page(executor, pending, query, offset, domains, total_domains)
+        finally:
+            for query in self.queries:
+                query.writer.close()
+
+        return self.get_stats(time.monotonic() - start_time)
+
+    def get_stats(self, elapsed=None):
+        """Get per-query and overall batch statistics"""
+        return {
+            'elapsed_seconds': round(elapsed, 2) if elapsed is not None else None,
+            'requests_made': self.requests_made,
+            'page_cache_hits': self.page_cache_hits,
+            'unique_records': len(self.records),
+            'queries': {
+                query.name: {
+                    'pages': query.pages,
+                    'rows_written': query.rows_written,
+                    'duplicate_rows': query.duplicate_rows,
+                    'errors': query.errors,
+                    'output_file': query.writer.filename,
+                }
+                for query in self.queries
+            },
+        }
+
+
+def main():
+    """Run a batch of searches from a JSON file"""
+    parser = argparse.ArgumentParser(description="Run saved Porkbun auction searches as one batch")
+    parser.add_argument('queries_file', help="JSON list of searches, e.g. [{\"name\": \"cheap-io\", \"params\": {\"tld\": \"io\"}}]")
+    parser.add_argument('--workers', type=int, default=BATCH_MAX_WORKERS, help="shared connection/thread count")
+    parser.add_argument('--rate', type=float, default=BATCH_REQUESTS_PER_SECOND, help="global requests per second")
+    parser.add_argument('--max-pages', type=int, default=None, help="page limit per query")
+    parser.add_argument('--output-dir', default=BATCH_OUTPUT_DIR, help="directory for per-query CSV files")
+    args = parser.parse_args()
+
+    with open(args.queries_file, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+
+    runner = BatchRunner(queries, max_workers=args.workers, requests_per_second=args.rate,
+                         output_dir=args.output_dir, max_pages=args.max_pages)
+    try:
+        stats = runner.run()
+    except KeyboardInterrupt:
+        print("\n\n⚠ Batch interrupted by user")
+        sys.exit(1)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
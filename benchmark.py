@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Parser and writer micro-benchmarks over the saved page corpus
+Times page parsing, the total count lookup and the CSV write path per page
+and per row, and compares throughput with a stored baseline so parser
+speedups don't silently regress
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from bs4 import BeautifulSoup
+from scraper import PorkbunScraper
+from csv_writer import CSVWriter
+from fast_parser import FastExtractor
+from schema import SchemaResolver
+from config import (
+    BENCHMARK_CORPUS_DIR, BENCHMARK_BASELINE_FILE, BENCHMARK_MAX_REGRESSION,
+    BENCHMARK_REPEAT, BENCHMARK_MIN_SECONDS, BENCHMARK_ATTEMPTS
+)
+
+# Expected records and totals of every corpus page, checked before timing
+EXPECTED_FILE = "expected.json"
+
+
+def load_corpus(corpus_dir=None):
+    """Saved pages of the corpus as {name: raw bytes}, sorted by name"""
+    corpus_dir = corpus_dir or BENCHMARK_CORPUS_DIR
+    return {
+        name: open(os.path.join(corpus_dir, name), 'rb').read()
+        for name in sorted(os.listdir(corpus_dir)) if name.endswith('.html')
+    }
+
+
+def parse_page(content):
+    """Records and total count of a page, parsed the way the scraper does"""
+    scraper = PorkbunScraper(page_cache=False)
+    with redirect_stdout(StringIO()):
+        soup = BeautifulSoup(content.decode('utf-8'), 'html.parser')
+        return scraper._extract_domains_from_page(soup), scraper._get_total_domains_count(soup)
+
+
+def expected_page(content):
+    """Expected output of a page in the format stored in expected.json"""
+    domains, total_domains = parse_page(content)
+    return {
+        'total_domains': total_domains,
+        'records': [domain.to_row() + [domain.auction_url] for domain in domains],
+    }
+
+
+def reference_workload():
+    """Fixed pure-Python workload that measures the speed of the machine itself"""
+    sorted(str(i * 7919 % 10007) for i in range(2000))
+
+
+def _calls_per_round(operation, min_seconds):
+    """Number of calls of operation() that take at least min_seconds"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        if time.perf_counter() - start >= min_seconds:
+            return number
+        number *= 2
+
+
+def _time_round(operation, number):
+    """Seconds per call over one round of number calls"""
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return (time.perf_counter() - start) / number
+
+
+def time_operation(operation, repeat=None, min_seconds=None):
+    """Best seconds per call of operation() and of the reference workload
+
+    Calls are looped until one round takes at least min_seconds. Rounds of
+    the operation and of the reference workload alternate, so both see the
+    same machine load, and the fastest of repeat rounds of each is kept to
+    filter out scheduling noise.
+    """
+    repeat = repeat or BENCHMARK_REPEAT
+    min_seconds = min_seconds or BENCHMARK_MIN_SECONDS
+    number = _calls_per_round(operation, min_seconds)
+    reference_number = _calls_per_round(reference_workload, min_seconds)
+    best = reference_best = float('inf')
+    for _ in range(repeat):
+        best = min(best, _time_round(operation, number))
+        reference_best = min(reference_best, _time_round(reference_workload, reference_number))
+    return best, reference_best
+
+
+def benchmark_page(content, output_dir, repeat=None, min_seconds=None, only=None):
+    """Throughput of every timed operation on one page
+
+    relative_speed is throughput in units of the reference workload, so
+    results recorded on one machine can be compared on another. Pages
+    without rows are only checked for correctness, not timed.
+    """
+    scraper = PorkbunScraper(page_cache=False)
+    fast_extractor = FastExtractor(SchemaResolver())
+    text = content.decode('utf-8')
+    soup = BeautifulSoup(text, 'html.parser')
+    with redirect_stdout(StringIO()):
+        domains = scraper._extract_domains_from_page(soup)
+    rows = len(domains)
+    if not rows:
+        return {}
+
+    writer = CSVWriter(os.path.join(output_dir, 'benchmark.csv'))
+    with redirect_stdout(StringIO()):
+        writer.open()
+        try:
+            operations = {
+                'soup': lambda: BeautifulSoup(text, 'html.parser'),
+                'extract': lambda: scraper._extract_domains_from_page(soup),
+                'total_count': lambda: scraper._get_total_domains_count(soup),
+                'fast_extract': lambda: fast_extractor.extract_domains(content),
+                'csv_write': lambda: writer.write_multiple_domains(domains),
+            }
+            results = {}
+            for name, operation in operations.items():
+                if only is not None and name not in only:
+                    continue
+                seconds, reference_seconds = time_operation(operation, repeat, min_seconds)
+                results[name] = {
+                    'seconds_per_page': seconds,
+                    'pages_per_second': round(1 / seconds, 1),
+                    'rows_per_second': round(rows / seconds),
+                    'relative_speed': round(reference_seconds / seconds, 4),
+                }
+        finally:
+            writer.close()
+    return results
+
+
+def run_benchmark(corpus_dir=None, repeat=None, min_seconds=None, only=None):
+    """Benchmark every corpus page: {page: {operation: throughput}}
+
+    only optionally limits the run to {page: operations}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, content in load_corpus(corpus_dir).items():
+            if only is None or name in only:
+                page_results = benchmark_page(content, output_dir, repeat, min_seconds,
+                                              only[name] if only is not None else None)
+                if page_results:
+                    results[name] = page_results
+    return results
+
+
+def keep_fastest(results, other):
+    """Replace results with any faster measurements from another run"""
+    for page, operations in other.items():
+        for operation, measured in operations.items():
+            current = results.setdefault(page, {}).get(operation)
+            if current is None or measured['relative_speed'] > current['relative_speed']:
+                results[page][operation] = measured
+
+
+def find_regressions(results, baseline, max_regression=None):
+    """{page: {operation: drop}} for every operation whose relative speed fell
+    more than max_regression below the baseline"""
+    max_regression = BENCHMARK_MAX_REGRESSION if max_regression is None else max_regression
+    regressions = {}
+    for page, operations in baseline.items():
+        for operation, expected in operations.items():
+            measured = results.get(page, {}).get(operation)
+            if measured is None:
+                continue
+            drop = 1 - measured['relative_speed'] / expected['relative_speed']
+            if drop > max_regression:
+                regressions.setdefault(page, {})[operation] = drop
+    return regressions
+
+
+def check_baseline(baseline, corpus_dir=None, max_regression=None, attempts=None):
+    """Benchmark against the baseline, re-timing regressed operations
+
+    Timings on a busy machine only ever come out slow, so an operation is
+    re-timed up to attempts times and its best result kept before it
+    counts as a regression. Returns (results, regressions).
+    """
+    attempts = attempts or BENCHMARK_ATTEMPTS
+    results = run_benchmark(corpus_dir)
+    regressions = find_regressions(results, baseline, max_regression)
+    for _ in range(attempts - 1):
+        if not regressions:
+            break
+        keep_fastest(results, run_benchmark(
+            corpus_dir, only={page: set(operations) for page, operations in regressions.items()}))
+        regressions = find_regressions(results, baseline, max_regression)
+    return results, regressions
+
+
+def load_baseline(filename=None):
+    """Stored baseline results, or None if there is none yet"""
+    filename = filename or BENCHMARK_BASELINE_FILE
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_baseline(results, filename=None):
+    """Store results as the new baseline"""
+    filename = filename or BENCHMARK_BASELINE_FILE
+    baseline = {
+        'python': sys.version.split()[0],
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': {
+            page: {
+                operation: {key: value for key, value in measured.items() if key != 'seconds_per_page'}
+                for operation, measured in operations.items()
+            }
+            for page, operations in results.items()
+        },
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Baseline written to: {filename}")
+
+
+def save_expected(corpus_dir=None):
+    """Record the expected output of every corpus page"""
+    corpus_dir = corpus_dir or BENCHMARK_CORPUS_DIR
+    expected = {name: expected_page(content) for name, content in load_corpus(corpus_dir).items()}
+    filename = os.path.join(corpus_dir, EXPECTED_FILE)
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(expected, f, indent=1)
+    print(f"Expected output written to: {filename}")
+
+
+def print_results(results):
+    """Print a throughput table"""
+    print(f"{'page':<20} {'operation':<14} {'pages/s':>10} {'rows/s':>10} {'relative':>10}")
+    for page, operations in results.items():
+        for operation, measured in operations.items():
+            print(f"{page:<20} {operation:<14} {measured['pages_per_second']:>10.1f} "
+                  f"{measured['rows_per_second']:>10} {measured['relative_speed']:>10.4f}")
+
+
+def main():
+    """Run the benchmarks and compare them with the baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark parsing and CSV writing over the saved page corpus")
+    parser.add_argument('--corpus', default=BENCHMARK_CORPUS_DIR, help="directory of saved pages")
+    parser.add_argument('--baseline', default=BENCHMARK_BASELINE_FILE, help="baseline results file")
+    parser.add_argument('--max-regression', type=float, default=BENCHMARK_MAX_REGRESSION,
+                        help="allowed throughput drop below the baseline (fraction)")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--update-expected', action='store_true',
+                        help="record the current parser output as the expected corpus output")
+    args = parser.parse_args()
+
+    if args.update_expected:
+        save_expected(args.corpus)
+        return 0
+
+    if args.update_baseline:
+        # Best of several runs, so the baseline isn't recorded during a slow spell
+        results = run_benchmark(args.corpus)
+        for _ in range(BENCHMARK_ATTEMPTS - 1):
+            keep_fastest(results, run_benchmark(args.corpus))
+        print_results(results)
+        save_baseline(results, args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print_results(run_benchmark(args.corpus))
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    results, regressions = check_baseline(baseline, args.corpus, args.max_regression)
+    print_results(results)
+    for page, operations in regressions.items():
+        for operation, drop in operations.items():
+            print(f"✗ {page} {operation}: {drop * 100:.0f}% slower than the baseline")
+    if not regressions:
+        print("✓ No throughput regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,20 @@ BASE_URL = "https://porkbun.com/auctions"
 # Output CSV file name
 OUTPUT_FILE = "porkbun_auctions.csv"
 
+# Output compression: None, 'gzip' or 'zstd' (inferred from a .gz/.zst file name when None)
+OUTPUT_COMPRESSION = None
+
+# Additional outputs written from the same crawl (None disables a sink)
+OUTPUT_JSONL_FILE = None  # JSON lines, one record per line
+OUTPUT_SQLITE_FILE = None  # SQLite database; every crawl appends its rows
+SQLITE_TABLE = "auctions"
+
+# Partitioned output: one CSV per partition instead of OUTPUT_FILE (None disables)
+PARTITION_BY = None  # 'tld' or 'hash' (domain hash buckets)
+PARTITION_OUTPUT_DIR = "partitions"  # Partition files and manifest.json are written here
+PARTITION_BUCKETS = 16  # Number of buckets when partitioning by hash
+PARTITION_WRITERS = 4  # Writer threads; each owns a fixed subset of the partitions
+
 # Search parameters
 SEARCH_QUERY = ""  # Empty string means no search filter (scrape all domains)
 MAX_PAGES_LIMIT = None  # None means no limit (scrape all available pages)
@@ -22,8 +36,12 @@ SEARCH_PARAMS = {
 }
 
 # Request settings
-REQUEST_DELAY_MIN = 1.0  # Minimum delay between requests in seconds
-REQUEST_DELAY_MAX = 3.0  # Maximum delay between requests in seconds
+REQUESTS_PER_SECOND = 5.0  # Global request budget shared by all workers of a scraper
+SERIAL_REQUESTS_PER_SECOND = 0.5  # Budget of a scraper created for the serial executor (one request every 2 s)
+
+# Execution settings
+EXECUTOR = 'serial'  # Default executor: serial, thread, async or process
+CHECKPOINT_INTERVAL = 50  # Save scraping state every N completed pages
 
 # Retry settings
 MAX_RETRIES = 3
@@ -39,10 +57,30 @@ HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
+# Parser settings
+FAST_PARSER = False  # Use the regex extractor instead of BeautifulSoup
+PARSER_VERIFY_SAMPLE_RATE = 0.02  # Fraction of pages also parsed with BeautifulSoup to verify the fast parser
+STREAM_RESPONSES = False  # Read responses in chunks and parse rows as they arrive (regex extractor)
+STREAM_CHUNK_SIZE = 16 * 1024  # Bytes per chunk read from a streamed response
+SCHEMA_DRIFT = 'adapt'  # When the table header differs from COLUMN_HEADERS: 'adapt' (map by name) or 'fail'
+ROW_FILTERS = []  # Row predicates applied during extraction, e.g. ['bids_count==0', 'current_bid<20']
+OUTPUT_FIELDS = None  # Columns to extract and write, e.g. ['domain', 'current_bid'] (None keeps all; domain is always kept)
+SORT_STOP_AT = None  # Last wanted value of the sort key (startPrice, currentBid, bids or endTime), e.g. 50 or '1h'; later pages aren't fetched
+
+# Unchanged page cache settings
+PAGE_CACHE = False  # Reuse the previous run's records for pages whose auction table is unchanged
+PAGE_CACHE_FILE = "page_cache.sqlite"  # Fingerprints and records per page URL
+PAGE_CACHE_WRITE_UNCHANGED = False  # Also write reused records to the output (False: only changed pages are written)
+
 # Pagination settings
 DOMAINS_PER_PAGE = 100
 MAX_PAGES_TO_PROCESS = 3000  # Safety limit to prevent infinite loops
 
+# Page size negotiation
+PAGE_SIZE_PROBE = False  # Before a full crawl, probe whether the server honours larger pages
+PAGE_SIZE_PARAM = "perPage"  # Query parameter carrying the requested page size
+PAGE_SIZE_CANDIDATES = [1000, 500, 250]  # Sizes tried, largest first; the first verified one is used
+
 # CSV headers
 CSV_HEADERS = [
     'domain',
@@ -53,13 +91,93 @@ CSV_HEADERS = [
     'bids_count',
     'domain_age',
     'revenue',
-    'visitors'
+    'visitors',
+    'end_time'  # Absolute UTC end time, derived from time_left and the response time
 ]
 
+# Table header names (lowercase) accepted for each column read from the page, in the expected order
+COLUMN_HEADERS = {
+    'domain': ['domain', 'domain name'],
+    'tld': ['tld', 'extension'],
+    'time_left': ['time left', 'ends in', 'time remaining'],
+    'starting_price': ['starting price', 'start price', 'starting bid'],
+    'current_bid': ['current bid', 'bid', 'price'],
+    'bids_count': ['bids', 'bid count', '# bids'],
+    'domain_age': ['domain age', 'age'],
+    'revenue': ['revenue'],
+    'visitors': ['visitors', 'traffic'],
+}
+
 # Progress bar settings
 PROGRESS_BAR_WIDTH = 50
 PROGRESS_UPDATE_INTERVAL = 10  # Update progress every N domains
 AUTO_FLUSH_INTERVAL = 100  # Auto-flush CSV every N domains
+PROGRESS_MODE = 'auto'  # 'bar', 'json', 'quiet', or 'auto' (bar on a TTY, quiet otherwise)
+PROGRESS_REFRESH_INTERVAL = 0.5  # Seconds between progress renders
+PROGRESS_RATE_WINDOW = 30.0  # Seconds of history used for the rate and ETA
+
+# Background writer settings
+WRITER_QUEUE_SIZE = 64  # Maximum number of pending record batches
+FSYNC_INTERVAL = 5.0  # Seconds between fsync calls on the output file
+
+# Logging settings
+LOG_LEVEL = "INFO"  # Console level; DEBUG also shows every request and page
+LOG_JSON_FILE = None  # JSON lines log with offset, latency and status fields (None disables)
+LOG_JSON_LEVEL = "DEBUG"  # Level written to LOG_JSON_FILE
 
 # State saving settings
-STATE_FILE = "scraping_state.json"
\ No newline at end of file
+STATE_FILE = "scraping_state.json"
+
+# Watch mode settings
+WATCH_REQUESTS_PER_SECOND = 0.5  # Global request budget shared by all refreshes
+WATCH_REFRESH_TIERS = [  # (pages up to, refresh interval in seconds); None covers all remaining pages
+    (3, 5.0),
+    (20, 60.0),
+    (100, 900.0),
+    (None, 3600.0),
+]
+WATCH_TRACKED_FIELDS = ['current_bid', 'bids_count']  # Changes to these fields emit an update
+WATCH_OUTPUT_FILE = "auction_updates.jsonl"
+
+# Detail page enrichment settings
+ENRICH_MAX_WORKERS = 4  # Concurrent auction page requests (still bounded by REQUESTS_PER_SECOND)
+ENRICH_CACHE_FILE = "auction_details_cache.json"
+ENRICH_CACHE_TTL = 6 * 3600  # Seconds before a cached auction page is refetched
+ENRICH_DETAILS = False  # Enrich rows after a run_full_scraping.py crawl
+ENRICH_WHERE = []  # Rows to enrich, in ROW_FILTERS syntax, e.g. ['bids_count==0', 'tld==com']; all rows if empty
+ENRICH_OUTPUT_FILE = "auction_details.jsonl"  # Enriched rows with their details, as JSON lines
+
+# Aggregation settings
+AGGREGATE_REPORT_FILE = "tld_summary.json"  # Per-TLD summary written at the end of a run
+SKETCH_RELATIVE_ACCURACY = 0.01  # Relative error of the per-TLD quantile sketches
+
+# End time index settings
+END_TIME_INDEX_SUFFIX = ".endtime.idx"  # Sorted end-time side file written next to the CSV
+
+# Domain index settings
+DOMAIN_INDEX_SUFFIX = ".domain.idx"  # Sorted domain-hash side file written next to the CSV
+
+# Snapshot diff settings
+DIFF_CHUNK_ROWS = 200000  # Rows sorted in memory per chunk during the external sort
+DIFF_IGNORE_FIELDS = ['time_left', 'end_time']  # Fields that change on every crawl and are not reported
+
+# Autotune settings
+AUTOTUNE_PROFILE_FILE = "autotune_profile.json"  # Recommended settings, loaded by the scraper at start
+AUTOTUNE_WORKERS = [2, 5, 10]  # Worker counts swept during calibration
+AUTOTUNE_RATES = [2.0, 5.0, 10.0]  # Request rates (requests per second) swept during calibration
+AUTOTUNE_PAGES = 8  # Pages fetched per calibration trial
+AUTOTUNE_MAX_ERROR_RATE = 0.02  # Highest error + throttle rate a recommended setting may have
+AUTOTUNE_COOLDOWN = 5.0  # Seconds between trials so throttling windows can reset
+
+# Benchmark settings
+BENCHMARK_CORPUS_DIR = "benchmark_corpus"  # Saved auction pages timed by benchmark.py
+BENCHMARK_BASELINE_FILE = "benchmark_corpus/baseline.json"  # Stored throughput to compare against
+BENCHMARK_MAX_REGRESSION = 0.30  # Fail when pages/s drops more than this fraction below the baseline
+BENCHMARK_REPEAT = 5  # Timed rounds per operation; the fastest is kept
+BENCHMARK_MIN_SECONDS = 0.02  # Minimum length of a timed round
+BENCHMARK_ATTEMPTS = 3  # Runs before a slow operation counts as a regression (best run kept)
+
+# Batch query settings
+BATCH_MAX_WORKERS = 10  # Connections/threads shared by all queries in a batch
+BATCH_REQUESTS_PER_SECOND = 2.0  # Global request budget shared by all queries
+BATCH_OUTPUT_DIR = "batch_output"  # One CSV per query is written here
\ No newline at end of file
@@ -1,11 +1,72 @@
 import csv
+import gzip
 import os
 from datetime import datetime
-from config import OUTPUT_FILE, CSV_HEADERS
+from config import OUTPUT_FILE, CSV_HEADERS, OUTPUT_COMPRESSION, END_TIME_INDEX_SUFFIX, DOMAIN_INDEX_SUFFIX
+from records import DomainRecord
+from row_filter import output_fields
+from log_utils import get_logger
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+logger = get_logger(__name__)
+
+
+def detect_compression(filename):
+    """Infer the compression codec from a file name"""
+    if filename.endswith('.gz'):
+        return 'gzip'
+    if filename.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def open_output(filename, mode='a', compression=None):
+    """Open a text stream for CSV output, optionally compressed"""
+    if compression == 'gzip':
+        return gzip.open(filename, mode + 't', newline='', encoding='utf-8')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.open(filename, mode + 't', newline='', encoding='utf-8')
+    if compression:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return open(filename, mode, newline='', encoding='utf-8')
+
+
+def open_input(filename):
+    """Open a CSV snapshot for reading, decompressing by file name"""
+    return open_output(filename, 'r', detect_compression(filename))
+
+
+def parse_csv_line(line):
+    """Parse one raw CSV line (bytes) into a row"""
+    return next(csv.reader([line.decode('utf-8')]), [])
+
+
+def iter_csv_offsets(filename):
+    """Yield (byte offset, row) for each line of an uncompressed CSV, header first
+
+    Used to build sidecar indexes that locate rows by offset; rows must not
+    contain embedded newlines (ours never do).
+    """
+    if detect_compression(filename):
+        raise ValueError(f"Can't index {filename}: rows of a compressed CSV have no byte offsets")
+    with open(filename, 'rb') as f:
+        offset = 0
+        for line in f:
+            yield offset, parse_csv_line(line)
+            offset += len(line)
+
 
 class CSVWriter:
-    def __init__(self, filename=None):
+    def __init__(self, filename=None, compression=None, fields=None):
         self.filename = filename or OUTPUT_FILE
+        self.compression = compression or OUTPUT_COMPRESSION or detect_compression(self.filename)
+        self.fields = list(output_fields(fields))  # Projected columns, OUTPUT_FIELDS by default
         self.file = None
         self.writer = None
         self.is_open = False
@@ -23,26 +84,62 @@ class CSVWriter:
             # Check if file exists to determine if we need to write headers
             file_exists = os.path.exists(self.filename) and os.path.getsize(self.filename) > 0
             
-            self.file = open(self.filename, 'a', newline='', encoding='utf-8')
+            # Rows of a different column layout would misalign the file, so start a new one
+            if file_exists and self._existing_header() not in (None, self.fields):
+                logger.warning("%s has different columns than this run writes; moving it aside", self.filename)
+                if self.backup_file() is None:
+                    raise RuntimeError(f"Refusing to append to {self.filename}: its columns differ "
+                                       f"and it could not be backed up")
+                # Indexes of the old file would point into the new one
+                for suffix in (END_TIME_INDEX_SUFFIX, DOMAIN_INDEX_SUFFIX):
+                    if os.path.exists(self.filename + suffix):
+                        os.remove(self.filename + suffix)
+                file_exists = False
+
+            self.file = open_output(self.filename, 'a', self.compression)
             self.writer = csv.writer(self.file)
             
             # Write headers if file is new
             if not file_exists:
-                self.writer.writerow(CSV_HEADERS)
+                self.writer.writerow(self.fields)
                 
             self.is_open = True
-            print(f"CSV file opened: {self.filename}")
+            logger.info("CSV file opened: %s", self.filename)
             
         except Exception as e:
-            print(f"Error opening CSV file: {e}")
+            logger.error("Error opening CSV file: %s", e, extra={'error': str(e)})
             raise
+
+    def _existing_header(self):
+        """Header row of the existing output file, or None when it can't be read"""
+        try:
+            with open_input(self.filename) as f:
+                return next(csv.reader(f), None)
+        except Exception:
+            return None
             
     def close(self):
         """Close the CSV file"""
         if self.file and self.is_open:
             self.file.close()
             self.is_open = False
-            print(f"CSV file closed: {self.filename}")
+            logger.info("CSV file closed: %s", self.filename)
+
+    def _format_row(self, domain_data):
+        """Build a CSV row with all fields present in the correct order"""
+        if isinstance(domain_data, DomainRecord):
+            # Records are already stripped and ordered
+            if self.fields == CSV_HEADERS:
+                return domain_data.to_row()
+            return [getattr(domain_data, header) for header in self.fields]
+        row = []
+        for header in self.fields:
+            value = domain_data.get(header, '')
+            # Clean up the data
+            if isinstance(value, str):
+                value = value.strip()
+            row.append(value)
+        return row
             
     def write_domain_data(self, domain_data):
         """Write a single domain's data to the CSV file"""
@@ -50,21 +147,16 @@ class CSVWriter:
             raise RuntimeError("CSV file is not open. Call open() first.")
             
         try:
-            # Ensure all fields are present in the correct order
-            row = []
-            for header in CSV_HEADERS:
-                value = domain_data.get(header, '')
-                # Clean up the data
-                if isinstance(value, str):
-                    value = value.strip()
-                row.append(value)
-                
-            self.writer.writerow(row)
+            self.writer.writerow(self._format_row(domain_data))
             return True
             
         except Exception as e:
-            print(f"Error writing domain data to CSV: {e}")
+            logger.error("Error writing domain data to CSV: %s", e, extra={'error': str(e)})
             return False
+
+    def write_domain(self, domain_data):
+        """Alias of write_domain_data used by AutoFlushWriter"""
+        return self.write_domain_data(domain_data)
             
     def write_multiple_domains(self, domains_data):
         """Write multiple domain records to the CSV file"""
@@ -73,6 +165,20 @@ class CSVWriter:
             if self.write_domain_data(domain_data):
                 success_count += 1
         return success_count
+
+    def flush(self):
+        """Flush buffered rows to the operating system"""
+        if self.file and self.is_open:
+            self.file.flush()
+
+    def sync(self):
+        """Flush buffered rows and fsync them to disk"""
+        self.flush()
+        try:
+            os.fsync(self.file.fileno())
+        except (AttributeError, OSError, ValueError):
+            # Some compressed streams don't expose a file descriptor
+            pass
         
     def get_file_size(self):
         """Get the current size of the CSV file"""
@@ -87,8 +193,8 @@ class CSVWriter:
             backup_filename = f"{self.filename}.backup_{timestamp}"
             try:
                 os.rename(self.filename, backup_filename)
-                print(f"Backup created: {backup_filename}")
+                logger.info("Backup created: %s", backup_filename)
                 return backup_filename
             except Exception as e:
-                print(f"Error creating backup: {e}")
-        return None
\ No newline at end of file
+                logger.error("Error creating backup: %s", e, extra={'error': str(e)})
+        return None
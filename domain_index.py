@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped domain index for auction CSV outputs
+A sidecar file of (domain hash, row byte offset) pairs sorted by hash, so
+a single domain is found with a binary search over an mmap and one row
+read, without scanning or loading the CSV
+"""
+
+import argparse
+import bisect
+import csv
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from csv_writer import iter_csv_offsets, parse_csv_line
+from config import OUTPUT_FILE, DOMAIN_INDEX_SUFFIX
+
+INDEX_MAGIC = b'PBDX0001'
+_HEADER = struct.Struct('<8sQ')  # magic, CSV size covered by the index
+_ENTRY = struct.Struct('<QQ')  # domain hash, byte offset of the row in the CSV
+
+
+def domain_hash(domain):
+    """64-bit hash of a domain name (case-insensitive)"""
+    return int.from_bytes(hashlib.blake2b(domain.strip().lower().encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def build_domain_index(csv_file=None, index_file=None):
+    """Write the sorted domain-hash side file for an uncompressed CSV; returns the number of entries"""
+    csv_file = csv_file or OUTPUT_FILE
+    index_file = index_file or csv_file + DOMAIN_INDEX_SUFFIX
+    covered_size = os.path.getsize(csv_file)
+    rows = iter_csv_offsets(csv_file)
+    _, header = next(rows, (0, []))
+    if 'domain' not in header:
+        raise ValueError(f"{csv_file} has no domain column")
+    column = header.index('domain')
+
+    entries = sorted((domain_hash(row[column]), offset) for offset, row in rows if len(row) > column and row[column])
+
+    temp_file = index_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, covered_size))
+        for entry in entries:
+            f.write(_ENTRY.pack(*entry))
+    os.replace(temp_file, index_file)
+    print(f"Domain index written: {index_file} ({len(entries)} rows)")
+    return len(entries)
+
+
+class DomainIndex:
+    """Point lookups of domains in a CSV through its domain index
+
+    Both files are memory-mapped; a lookup costs a binary search over the
+    hashes plus parsing the matching row(s). Reopen after the snapshot or
+    its index is rebuilt.
+    """
+
+    def __init__(self, csv_file=None, index_file=None):
+        self.csv_file = csv_file or OUTPUT_FILE
+        self.index_file = index_file or self.csv_file + DOMAIN_INDEX_SUFFIX
+        with open(self.index_file, 'rb') as f:
+            self.index_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, covered_size = _HEADER.unpack_from(self.index_mm, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{self.index_file} is not a domain index")
+        if os.path.getsize(self.csv_file) < covered_size:
+            raise ValueError(f"{self.index_file} is stale: {self.csv_file} was truncated or replaced")
+        # Flat view of the entries: hash of entry i at 2*i, its offset at 2*i + 1
+        if sys.byteorder != 'little':
+            raise RuntimeError("DomainIndex reads the little-endian index in place and needs a little-endian host")
+        self.entries = memoryview(self.index_mm)[_HEADER.size:].cast('Q')
+        self.hashes = self.entries[0::2]
+        with open(self.csv_file, 'rb') as f:
+            self.csv_mm = mmap.mmap(f.fileno(), covered_size, access=mmap.ACCESS_READ)
+        self.header = parse_csv_line(self.csv_mm[:self.csv_mm.find(b'\n') + 1])
+        self.column = self.header.index('domain')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def close(self):
+        self.hashes.release()
+        self.entries.release()
+        self.index_mm.close()
+        self.csv_mm.close()
+
+    def _row_at(self, offset):
+        """Parse the CSV row starting at a byte offset"""
+        end = self.csv_mm.find(b'\n', offset)
+        return parse_csv_line(self.csv_mm[offset:end + 1 if end >= 0 else len(self.csv_mm)])
+
+    def get_all(self, domain):
+        """Every row for a domain (as dicts), oldest first when it was written by several runs"""
+        target = domain_hash(domain)
+        wanted = domain.strip().lower()
+        rows = []
+        i = bisect.bisect_left(self.hashes, target)
+        while i < len(self.hashes) and self.hashes[i] == target:
+            row = self._row_at(self.entries[2 * i + 1])
+            # Hash collisions are resolved by comparing the stored domain
+            if len(row) > self.column and row[self.column].strip().lower() == wanted:
+                rows.append(dict(zip(self.header, row)))
+            i += 1
+        return rows
+
+    def get(self, domain):
+        """The most recently written row for a domain, or None"""
+        rows = self.get_all(domain)
+        return rows[-1] if rows else None
+
+    def __contains__(self, domain):
+        return self.get(domain) is not None
+
+
+def main():
+    """Build a domain index or look domains up"""
+    parser = argparse.ArgumentParser(description="Memory-mapped domain index for auction CSVs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="build the index for a CSV")
+    build.add_argument('csv', nargs='?', default=OUTPUT_FILE)
+    lookup = subparsers.add_parser('lookup', help="print the latest row for each domain")
+    lookup.add_argument('domains', nargs='+')
+    lookup.add_argument('--csv', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_domain_index(args.csv)
+        return
+    with DomainIndex(args.csv) as index:
+        writer = csv.DictWriter(sys.stdout, fieldnames=index.header)
+        writer.writeheader()
+        missing = []
+        for domain in args.domains:
+            row = index.get(domain)
+            if row is None:
+                missing.append(domain)
+            else:
+                writer.writerow(row)
+    for domain in missing:
+        print(f"Not found: {domain}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Sorted end-time side file for auction CSV outputs
+Maps absolute end times to row byte offsets in the CSV, so ending-soon
+lookups over a snapshot are a binary search plus a range scan over an
+mmap instead of a full parse of the CSV
+"""
+
+import argparse
+import bisect
+import csv
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+from csv_writer import iter_csv_offsets, parse_csv_line
+from config import OUTPUT_FILE, END_TIME_INDEX_SUFFIX
+
+INDEX_MAGIC = b'PBET0001'
+_HEADER = struct.Struct('<8sQ')  # magic, CSV size covered by the index
+_ENTRY = struct.Struct('<qQ')  # end time (Unix seconds), byte offset of the row in the CSV
+
+
+def build_end_time_index(csv_file=None, index_file=None):
+    """Write the sorted end-time side file for an uncompressed CSV; returns the number of entries
+
+    Rows are located by byte offset, so compressed CSVs can't be indexed.
+    Rows without an end_time (e.g. from before the column existed) are skipped.
+    """
+    csv_file = csv_file or OUTPUT_FILE
+    index_file = index_file or csv_file + END_TIME_INDEX_SUFFIX
+    covered_size = os.path.getsize(csv_file)
+    rows = iter_csv_offsets(csv_file)
+    _, header = next(rows, (0, []))
+    if 'end_time' not in header:
+        raise ValueError(f"{csv_file} has no end_time column")
+    column = header.index('end_time')
+
+    entries = []
+    for offset, row in rows:
+        if len(row) > column and row[column]:
+            try:
+                entries.append((int(datetime.fromisoformat(row[column]).timestamp()), offset))
+            except ValueError:
+                pass
+    entries.sort()
+
+    temp_file = index_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, covered_size))
+        for entry in entries:
+            f.write(_ENTRY.pack(*entry))
+    os.replace(temp_file, index_file)
+    print(f"End time index written: {index_file} ({len(entries)} rows)")
+    return len(entries)
+
+
+class _EndTimes:
+    """Sequence view of the end times in an index, for bisect"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        return self.index.entry(i)[0]
+
+
+class EndTimeIndex:
+    """Range lookups by end time over a CSV and its end-time side file"""
+
+    def __init__(self, csv_file=None, index_file=None):
+        self.csv_file = csv_file or OUTPUT_FILE
+        self.index_file = index_file or self.csv_file + END_TIME_INDEX_SUFFIX
+        with open(self.index_file, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, covered_size = _HEADER.unpack_from(self.mm, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{self.index_file} is not an end time index")
+        if os.path.getsize(self.csv_file) < covered_size:
+            raise ValueError(f"{self.index_file} is stale: {self.csv_file} was truncated or replaced")
+        self.count = (len(self.mm) - _HEADER.size) // _ENTRY.size
+        self.csv = open(self.csv_file, 'rb')
+        self.header = parse_csv_line(self.csv.readline())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.mm.close()
+        self.csv.close()
+
+    def entry(self, i):
+        """(end time, CSV byte offset) of the i-th entry in end time order"""
+        return _ENTRY.unpack_from(self.mm, _HEADER.size + i * _ENTRY.size)
+
+    def range(self, start=None, end=None):
+        """Yield rows (as dicts) with start <= end_time < end, soonest first
+
+        Bounds are datetimes or Unix timestamps; None leaves a side open.
+        """
+        start = start.timestamp() if isinstance(start, datetime) else start
+        end = end.timestamp() if isinstance(end, datetime) else end
+        end_times = _EndTimes(self)
+        first = 0 if start is None else bisect.bisect_left(end_times, start)
+        last = self.count if end is None else bisect.bisect_left(end_times, end)
+        for i in range(first, last):
+            self.csv.seek(self.entry(i)[1])
+            yield dict(zip(self.header, parse_csv_line(self.csv.readline())))
+
+    def ending_within(self, seconds, now=None):
+        """Rows of auctions ending in the next `seconds` seconds"""
+        now = now or datetime.now(timezone.utc)
+        now = now.timestamp() if isinstance(now, datetime) else now
+        return self.range(now, now + seconds)
+
+
+def main():
+    """Build an end time index or query one"""
+    parser = argparse.ArgumentParser(description="Sorted end-time side file for auction CSVs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="build the index for a CSV")
+    build.add_argument('csv', nargs='?', default=OUTPUT_FILE)
+    query = subparsers.add_parser('ending', help="print rows ending within a time window")
+    query.add_argument('csv', nargs='?', default=OUTPUT_FILE)
+    query.add_argument('--within', type=float, default=3600, help="seconds from now (default: 3600)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_end_time_index(args.csv)
+        return
+    with EndTimeIndex(args.csv) as index:
+        writer = csv.DictWriter(sys.stdout, fieldnames=index.header)
+        writer.writeheader()
+        for row in index.ending_within(args.within):
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+import asyncio
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+)
+from config import (
+    DOMAINS_PER_PAGE, EXECUTOR, CHECKPOINT_INTERVAL, PAGE_CACHE_WRITE_UNCHANGED,
+    PAGE_SIZE_PROBE, PAGE_SIZE_PARAM, PAGE_SIZE_CANDIDATES
+)
+from progress_utils import ProgressTracker
+from log_utils import get_logger, flush_logs
+from row_filter import FilteredRows, rows_scanned, past_bound
+
+EXECUTORS = ('serial', 'thread', 'async', 'process')
+
+logger = get_logger(__name__)
+
+# Scraper used for parsing inside process pool workers
+_worker_scraper = None
+
+
+class PageContent:
+    """Picklable stand-in for a response: the raw body, its text encoding and headers"""
+
+    def __init__(self, content, encoding=None, headers=None):
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', 'replace')
+
+
+def _init_parse_worker(fast_parse, where, fields, stop_at, schema_drift, base_url, search_params):
+    """Create the per-process scraper used only for parsing"""
+    global _worker_scraper
+    from scraper import PorkbunScraper
+    _worker_scraper = PorkbunScraper(fast_parse=fast_parse, page_cache=False, where=where, fields=fields,
+                                     stop_at=stop_at, schema_drift=schema_drift, base_url=base_url,
+                                     **search_params)
+
+
+def _parse_in_worker(content, encoding, headers, url, parse_total):
+    """Parse a fetched page inside a process pool worker"""
+    page = PageContent(content, encoding, headers)
+    domains, total_domains = _worker_scraper._parse_page(page, url, parse_total)
+    _worker_scraper._stamp_end_times(domains, _worker_scraper._response_time(page))
+    return domains, total_domains
+
+
+class ScrapeEngine:
+    """Fetch/parse/write pipeline shared by every execution mode
+
+    Planning, rate limiting and retries (through the scraper), progress,
+    checkpointing and metrics are the same in every mode; only the executor
+    that runs the page fetches and parses differs:
+
+    - serial: one page at a time in the calling thread
+    - thread: fetch and parse on a thread pool
+    - async: an asyncio loop drives the blocking fetches on a thread pool
+    - process: fetch on a thread pool, parse on a process pool
+    """
+
+    def __init__(self, scraper, executor=None, max_workers=None):
+        executor = executor or EXECUTOR
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+        self.scraper = scraper
+        self.executor = executor
+        self.max_workers = 1 if executor == 'serial' else (max_workers or scraper.max_workers)
+        self.csv_writer = None
+        self.on_page = None
+        self.all_domains = []
+        self.completed_offsets = set()
+        self.next_contiguous_offset = 0
+        self.page_size = DOMAINS_PER_PAGE
+        self.total_domains = None
+        self.short_pages = {}  # offset -> (rows received, rows expected)
+        self.refill_seen = None  # Domains collected before short pages are refilled
+        self.bound_offset = None  # First page that reached rows past the sort bound
+        self.metrics = {}
+
+    def _probe_page(self, page_index, fetched_pages):
+        """Fetch a page for discovery, keeping its records for the main crawl"""
+        offset = page_index * DOMAINS_PER_PAGE
+        if offset not in fetched_pages:
+            domains, _ = self.scraper.scrape_page(offset)
+            if domains is None:
+                raise RuntimeError(f"probe of offset {offset} failed")
+            fetched_pages[offset] = domains
+        return rows_scanned(fetched_pages[offset]) > 0
+
+    def _discover_page_count(self, fetched_pages, limit):
+        """Find the number of pages when the results banner is missing
+
+        Starts from the previous run's page count for the same search when
+        one was saved, otherwise probes page indices exponentially until an
+        empty page is found, then binary searches for the last non-empty one.
+        Probes never go past the page limit, and a page past the sort bound
+        ends the search, since no later page is needed. Every probed page is
+        kept in fetched_pages so it is never refetched.
+        """
+        if rows_scanned(fetched_pages[0]) < DOMAINS_PER_PAGE or past_bound(fetched_pages[0]):
+            return 1
+
+        state_manager = self.scraper.state_manager
+        previous_pages = None
+        if state_manager.get_state('search_params') == self.scraper.search_params:
+            previous_pages = state_manager.get_state('total_pages')
+
+        def passed_bound(page_index):
+            return past_bound(fetched_pages[page_index * DOMAINS_PER_PAGE])
+
+        low = 0  # Known non-empty page
+        high = None  # Known empty page
+        if previous_pages and previous_pages > 1:
+            probe = min(previous_pages, limit) - 1
+            if self._probe_page(probe, fetched_pages):
+                if passed_bound(probe):
+                    return probe + 1
+                low = probe
+            else:
+                high = probe
+            logger.info("Reusing previous page count %d as discovery hint", previous_pages)
+
+        # Exponential search for an empty page
+        step = 1
+        while high is None:
+            probe = low + step
+            if probe >= limit:
+                high = limit
+                break
+            if self._probe_page(probe, fetched_pages):
+                if passed_bound(probe):
+                    return probe + 1
+                low = probe
+                step *= 2
+            else:
+                high = probe
+
+        # Binary search for the last non-empty page
+        while high - low > 1:
+            probe = (low + high) // 2
+            if probe < limit and self._probe_page(probe, fetched_pages):
+                if passed_bound(probe):
+                    return probe + 1
+                low = probe
+            else:
+                high = probe
+
+        return low + 1
+
+    def _negotiate_page_size(self, fetched_pages, total_domains):
+        """Find the largest page size the server verifiably honours
+
+        Each candidate is requested at offset 0 and accepted only when the
+        page holds exactly min(size, total_domains) rows and starts with the
+        rows of the default-size first page. An accepted page replaces page 0
+        in fetched_pages, so a successful probe costs no extra request.
+        Probes aren't counted as scraped pages unless they are accepted.
+        """
+        scraper = self.scraper
+        state_manager = scraper.state_manager
+        previous = state_manager.get_state('page_size')
+        if previous == DOMAINS_PER_PAGE:
+            logger.info("A previous probe found no larger page size; keeping %d rows per page "
+                        "(clear 'page_size' in the state file to re-probe)", DOMAINS_PER_PAGE)
+            return DOMAINS_PER_PAGE
+
+        # The size verified by the last run is tried first
+        candidates = sorted({size for size in PAGE_SIZE_CANDIDATES if size > DOMAINS_PER_PAGE}, reverse=True)
+        if previous in candidates:
+            candidates.remove(previous)
+            candidates.insert(0, previous)
+
+        first_rows = [domain.domain for domain in fetched_pages[0]]
+        ignored = 0
+        for size in candidates:
+            scraper.page_size = size
+            scraper.reused_offsets.discard(0)
+            try:
+                domains, _ = scraper.scrape_page(0, record=False)
+            finally:
+                scraper.page_size = DOMAINS_PER_PAGE
+            if domains is None:
+                logger.warning("Page size probe %s=%d failed", PAGE_SIZE_PARAM, size)
+                continue
+            expected = min(size, total_domains)
+            received = rows_scanned(domains)
+            if received == expected and [domain.domain for domain in domains[:len(first_rows)]] == first_rows:
+                logger.info("Server honours %s=%d: requesting %d rows per page", PAGE_SIZE_PARAM, size, size)
+                scraper._record_page(domains, 0, replaces=fetched_pages[0])
+                fetched_pages[0] = domains
+                state_manager.save_state(page_size=size)
+                return size
+            logger.info("Page size %d not honoured (%d of %d rows)", size, received, expected)
+            ignored += received == rows_scanned(fetched_pages[0])
+
+        # Only remember a negative result when the parameter was plainly ignored
+        if ignored == len(candidates):
+            state_manager.save_state(page_size=DOMAINS_PER_PAGE)
+        return DOMAINS_PER_PAGE
+
+    def _plan(self, max_pages):
+        """Probe the first page and work out the exact page range
+
+        Returns (page_count, fetched_pages, total_domains, known_pages) where
+        fetched_pages holds the records of every page fetched while planning.
+        page_count is in pages of self.page_size rows; known_pages is always
+        in pages of DOMAINS_PER_PAGE rows.
+        """
+        limit = self.scraper._resolve_max_pages(max_pages)
+        fetched_pages = {}
+
+        logger.info("Getting total domain count...")
+        domains, total_domains = self.scraper.scrape_page(0)
+        if domains is None:
+            return limit, fetched_pages, None, None
+        fetched_pages[0] = domains
+
+        if total_domains is not None:
+            known_pages = (total_domains + DOMAINS_PER_PAGE - 1) // DOMAINS_PER_PAGE
+            logger.info("Total domains to scrape: %d", total_domains)
+        elif limit <= 1:
+            return limit, fetched_pages, None, None
+        else:
+            logger.info("Total domain count not found, discovering last page...")
+            try:
+                known_pages = self._discover_page_count(fetched_pages, limit)
+                logger.info("Discovered %d pages using %d probe requests", known_pages, len(fetched_pages))
+            except RuntimeError as e:
+                logger.warning("Page discovery failed (%s), falling back to %d pages", e, limit)
+                return limit, fetched_pages, None, None
+
+        page_count = min(known_pages, limit)
+        # Larger pages only pay off for a full crawl; under a page limit they would overshoot it
+        if PAGE_SIZE_PROBE and total_domains is not None and 1 < page_count == known_pages:
+            self.page_size = self._negotiate_page_size(fetched_pages, total_domains)
+            if self.page_size != DOMAINS_PER_PAGE:
+                # Same rows as the default-size plan, in fewer requests
+                page_count = (page_count * DOMAINS_PER_PAGE + self.page_size - 1) // self.page_size
+        logger.info("Estimated pages to scrape: %d", page_count)
+        return page_count, fetched_pages, total_domains, known_pages
+
+    def _collect(self, offset, domains):
+        """Record a completed page and checkpoint periodically"""
+        if self.refill_seen is not None:
+            # A refill page runs into the rows after the gap, which were already collected
+            fetched = domains
+            domains = FilteredRows([domain for domain in fetched if domain.domain not in self.refill_seen],
+                                   rows_scanned(fetched), past_bound(fetched))
+            self.scraper._record_page(domains, offset, replaces=fetched)
+        # Add page offset to each domain for sorting
+        for domain in domains:
+            domain.page_offset = offset
+        self.all_domains.extend(domains)
+        # Pages reused from the page cache were already written by an earlier run
+        if self.csv_writer is not None and (PAGE_CACHE_WRITE_UNCHANGED or offset not in self.scraper.reused_offsets):
+            self.csv_writer.write_multiple_domains(domains)
+        if self.on_page is not None:
+            self.on_page(offset, domains)
+
+        self._check_page_size(offset, domains)
+        if past_bound(domains) and (self.bound_offset is None or offset < self.bound_offset):
+            self.bound_offset = offset
+            logger.info("Page %d passed the sort bound (%s); later pages are skipped",
+                        offset, self.scraper.sort_bound, extra={'offset': offset})
+        self.completed_offsets.add(offset)
+        while self.next_contiguous_offset in self.completed_offsets:
+            self.next_contiguous_offset += self.page_size
+        if len(self.completed_offsets) % CHECKPOINT_INTERVAL == 0:
+            self._checkpoint()
+
+    def _beyond_bound(self, offset):
+        """Whether a page lies after one that passed the sort bound, so all its rows are past it"""
+        return self.bound_offset is not None and offset > self.bound_offset
+
+    def _cancel_beyond_bound(self, futures):
+        """Cancel the queued futures of pages after the sort bound ({future: offset})"""
+        if self.bound_offset is None:
+            return
+        for future, offset in futures.items():
+            if self._beyond_bound(offset):
+                future.cancel()
+
+    def _check_page_size(self, offset, domains):
+        """Note a negotiated-size page that holds fewer rows than the total implies
+
+        Auctions end during a crawl, so the total read at the start runs
+        ahead of the results; a page only counts as truncated once
+        _truncated_pages finds rows after it.
+        """
+        if self.page_size == DOMAINS_PER_PAGE or self.total_domains is None or offset % self.page_size:
+            return
+        expected = min(self.page_size, self.total_domains - offset)
+        received = rows_scanned(domains)
+        if received < expected:
+            self.short_pages[offset] = (received, expected)
+            logger.debug("Page %d may be short: %d of %d rows", offset, received, expected,
+                         extra={'offset': offset, 'rows': received})
+
+    def _truncated_pages(self):
+        """Short pages followed by a non-empty page, i.e. silently truncated rather than at the end"""
+        return {offset: counts for offset, counts in self.short_pages.items()
+                if offset + self.page_size in self.completed_offsets}
+
+    def _refill_short_pages(self):
+        """Refetch the rows missing from silently truncated pages at the default size
+
+        The negotiated size stays saved: the result set may simply have
+        shifted while the crawl ran, and the next run verifies the size again.
+        """
+        missing = sum(expected - received for received, expected in self.short_pages.values())
+        logger.warning("%d pages of %d rows came back short (%d rows missing); refetching them %d rows at a time",
+                       len(self.short_pages), self.page_size, missing, DOMAINS_PER_PAGE)
+        self.scraper.page_size = DOMAINS_PER_PAGE
+        self.refill_seen = {domain.domain for domain in self.all_domains}
+        offsets = [
+            start
+            for offset, (received, expected) in sorted(self.short_pages.items())
+            for start in range(offset + received, offset + expected, DOMAINS_PER_PAGE)
+            if not self._beyond_bound(start)
+        ]
+        try:
+            getattr(self, f"_run_{self.executor}")(offsets)
+        finally:
+            self.refill_seen = None
+
+    def _checkpoint(self, **extra):
+        """Save crawl progress for resumption"""
+        self.scraper.state_manager.save_state(
+            last_offset=self.next_contiguous_offset,
+            total_pages_scraped=len(self.completed_offsets),
+            total_domains_scraped=len(self.all_domains),
+            search_params=self.scraper.search_params,
+            **extra
+        )
+
+    def _run_serial(self, offsets):
+        """Scrape pages one at a time in the calling thread"""
+        for offset in offsets:
+            if self._beyond_bound(offset):
+                break
+            domains, _ = self.scraper.scrape_page(offset)
+            if domains is None:
+                logger.warning("Failed to scrape page. Stopping.")
+                break
+            if not rows_scanned(domains):
+                logger.info("No more domains found. Stopping.")
+                break
+            self._collect(offset, domains)
+
+    def _run_thread(self, offsets):
+        """Scrape pages on a thread pool"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_offset = {executor.submit(self.scraper.scrape_page, offset): offset for offset in offsets}
+            for future in as_completed(future_to_offset):
+                offset = future_to_offset[future]
+                if future.cancelled() or self._beyond_bound(offset):
+                    continue
+                try:
+                    domains, _ = future.result()
+                except Exception as e:
+                    self._page_failed(offset, e)
+                    continue
+                if rows_scanned(domains):
+                    self._collect(offset, domains)
+                    if past_bound(domains):
+                        self._cancel_beyond_bound(future_to_offset)
+
+    def _run_async(self, offsets):
+        """Scrape pages from an asyncio loop over a thread pool"""
+        asyncio.run(self._run_async_pages(offsets))
+
+    async def _run_async_pages(self, offsets):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            async def scrape(offset):
+                async with semaphore:
+                    if self._beyond_bound(offset):
+                        return offset, None, None
+                    try:
+                        result = await loop.run_in_executor(executor, self.scraper.scrape_page, offset)
+                    except Exception as e:
+                        return offset, None, e
+                    return offset, result[0], None
+
+            for next_result in asyncio.as_completed([scrape(offset) for offset in offsets]):
+                offset, domains, error = await next_result
+                if error is not None:
+                    self._page_failed(offset, error)
+                elif rows_scanned(domains) and not self._beyond_bound(offset):
+                    self._collect(offset, domains)
+
+    def _run_process(self, offsets):
+        """Fetch pages on a thread pool and parse them on a process pool"""
+        scraper = self.scraper
+        fast_parse = scraper.differential_checker is not None
+        row_filter = scraper.row_filter
+        initargs = (fast_parse, row_filter.where if row_filter else [], row_filter.fields if row_filter else [],
+                    scraper.sort_bound.value if scraper.sort_bound else '', scraper.schema.policy,
+                    scraper.base_url, scraper.search_params)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_parse_worker,
+                                    initargs=initargs) as parse_pool:
+            fetch_futures = {fetch_pool.submit(scraper.fetch_page, offset): offset for offset in offsets}
+            parse_futures = {}
+            pending = set(fetch_futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    if future in fetch_futures:
+                        offset = fetch_futures[future]
+                        if self._beyond_bound(offset):
+                            continue
+                        try:
+                            url, response = future.result()
+                        except Exception as e:
+                            self._page_failed(offset, e)
+                            continue
+                        if not response:
+                            scraper._record_failure()
+                            continue
+                        cached, fingerprint = scraper._reuse_cached_page(offset, url, response)
+                        if cached is not None:
+                            scraper._record_page(cached[0], offset)
+                            if rows_scanned(cached[0]):
+                                self._collect(offset, cached[0])
+                            continue
+                        parse_future = parse_pool.submit(
+                            _parse_in_worker, response.content, response.encoding,
+                            {'Date': response.headers.get('Date')}, url, offset == 0)
+                        parse_futures[parse_future] = (offset, url, fingerprint)
+                        pending.add(parse_future)
+                    else:
+                        offset, url, fingerprint = parse_futures.pop(future)
+                        try:
+                            domains, _ = future.result()
+                        except Exception as e:
+                            self._page_failed(offset, e)
+                            continue
+                        scraper._cache_page(url, fingerprint, domains)
+                        scraper._record_page(domains, offset)
+                        if rows_scanned(domains) and not self._beyond_bound(offset):
+                            self._collect(offset, domains)
+                            if past_bound(domains):
+                                self._cancel_beyond_bound(fetch_futures)
+
+    def _page_failed(self, offset, error):
+        """Count a page that raised instead of returning a result"""
+        logger.error("Error scraping page %d: %s", offset, error, extra={'offset': offset, 'error': str(error)})
+        self.scraper._record_failure(count_error=True)
+
+    def run(self, max_pages=None, csv_writer=None, on_page=None):
+        """Scrape every planned page and return (all_domains, total_domains)
+
+        When csv_writer is given, each page is handed to it as soon as it
+        completes instead of being left for the caller to write at the end.
+        on_page(offset, domains) is called for each completed page.
+        """
+        scraper = self.scraper
+        self.csv_writer = csv_writer
+        self.on_page = on_page
+        start_time = time.monotonic()
+        scraper.reused_offsets = set()
+        self.page_size = DOMAINS_PER_PAGE
+        self.short_pages = {}
+        self.bound_offset = None
+        page_count, fetched_pages, total_domains, known_pages = self._plan(max_pages)
+        self.total_domains = total_domains
+
+        # Record the column layout detected on the first page with the run metadata
+        if scraper.schema.current is not None:
+            scraper.state_manager.save_state(schema=scraper.schema.current.to_dict())
+
+        # Show search parameters if any
+        if any(scraper.search_params.values()):
+            active_params = {k: v for k, v in scraper.search_params.items() if v}
+            logger.info("Search parameters: %s", active_params)
+
+        logger.info("Starting to scrape Porkbun auction pages with the %s executor (%d workers)...",
+                    self.executor, self.max_workers)
+        scraper.progress = ProgressTracker(total=total_domains)
+        scraper.progress.start()
+        try:
+            scraper.page_size = self.page_size
+            offsets = range(0, page_count * self.page_size, self.page_size)
+
+            # Pages fetched while planning are reused instead of requested again
+            for offset in offsets:
+                if rows_scanned(fetched_pages.get(offset)) and not self._beyond_bound(offset):
+                    self._collect(offset, fetched_pages[offset])
+                    scraper.progress.add(pages=1, domains=len(fetched_pages[offset]))
+
+            pending_offsets = [offset for offset in offsets
+                               if offset not in fetched_pages and not self._beyond_bound(offset)]
+            getattr(self, f"_run_{self.executor}")(pending_offsets)
+            self.short_pages = self._truncated_pages()
+            if self.short_pages:
+                self._refill_short_pages()
+        finally:
+            scraper.page_size = DOMAINS_PER_PAGE
+            flush_logs()
+            scraper.progress.finish()
+            scraper.progress = None
+            if scraper.page_cache is not None:
+                scraper.page_cache.commit()
+
+        # Sort domains by original page order
+        self.all_domains.sort(key=lambda x: x.page_offset or 0)
+
+        elapsed = time.monotonic() - start_time
+        stats = scraper.get_scraping_stats()
+        self.metrics = {
+            'executor': self.executor,
+            'max_workers': self.max_workers,
+            'pages': len(self.completed_offsets),
+            'domains': len(self.all_domains),
+            'errors': scraper.error_count,
+            'elapsed_seconds': round(elapsed, 3),
+            'pages_per_second': round(len(self.completed_offsets) / elapsed, 2) if elapsed else 0.0,
+            'domains_per_second': round(len(self.all_domains) / elapsed, 1) if elapsed else 0.0,
+            'fetch_seconds': stats['fetch_seconds'],
+            'parse_seconds': stats['parse_seconds'],
+            'pages_reused': len(scraper.reused_offsets),
+            'page_size': self.page_size,
+            'short_pages': len(self.short_pages),
+            'bound_offset': self.bound_offset,
+        }
+        scraper.last_run_metrics = self.metrics
+
+        logger.info("\nScraping completed!")
+        logger.info("Total pages processed: %d", len(self.completed_offsets))
+        logger.info("Total domains scraped: %d", len(self.all_domains))
+        logger.info("Total errors encountered: %d", scraper.error_count)
+        if self.bound_offset is not None:
+            logger.info("Stopped at the sort bound after page %d", self.bound_offset)
+        logger.info("Throughput: %s pages/s (%s executor)", self.metrics['pages_per_second'], self.executor)
+
+        # Save state for resumption and so the next run can skip discovery
+        if known_pages is not None:
+            self._checkpoint(total_pages=known_pages, total_domains=total_domains)
+        else:
+            self._checkpoint()
+
+        # Callers print their own summary next, after everything logged so far
+        flush_logs()
+        return self.all_domains, total_domains
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from config import ENRICH_MAX_WORKERS, ENRICH_CACHE_FILE, ENRICH_CACHE_TTL, ENRICH_WHERE
+from log_utils import get_logger
+from row_filter import Predicate
+
+logger = get_logger(__name__)
+
+# Fields that change while an auction runs; a cached entry is only reused if they match
+_VERSION_FIELDS = ('current_bid', 'bids_count')
+
+
+def _label_key(label):
+    """Normalize a detail label like 'Registration Date:' to registration_date"""
+    return re.sub(r'[^a-z0-9]+', '_', label.lower()).strip('_')
+
+
+class DetailCache:
+    """Per-domain cache of auction page details with a TTL, stored as JSON"""
+
+    def __init__(self, cache_file=None, ttl=None):
+        self.cache_file = cache_file or ENRICH_CACHE_FILE
+        self.ttl = ENRICH_CACHE_TTL if ttl is None else ttl
+        self.entries = self._load()
+        self.lock = threading.Lock()
+
+    def _load(self):
+        """Load cached entries from file"""
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning("Could not load detail cache: %s", e, extra={'error': str(e)})
+        return {}
+
+    def get(self, record):
+        """Cached details for a record, or None if missing, expired or changed"""
+        entry = self.entries.get(record.domain)
+        if entry is None or time.time() - entry['fetched_at'] > self.ttl:
+            return None
+        if entry['version'] != [record.get(field, '') for field in _VERSION_FIELDS]:
+            return None
+        return entry['details']
+
+    def put(self, record, details):
+        """Store details fetched for a record"""
+        with self.lock:
+            self.entries[record.domain] = {
+                'fetched_at': time.time(),
+                'version': [record.get(field, '') for field in _VERSION_FIELDS],
+                'details': details,
+            }
+
+    def save(self):
+        """Write the cache to file, dropping expired entries"""
+        now = time.time()
+        with self.lock:
+            self.entries = {domain: entry for domain, entry in self.entries.items()
+                            if now - entry['fetched_at'] <= self.ttl}
+            try:
+                with open(self.cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f)
+            except IOError as e:
+                logger.warning("Could not save detail cache: %s", e, extra={'error': str(e)})
+
+
+class DetailEnricher:
+    """Follows each row's auction link and attaches the page's details
+
+    Requests go through the scraper's _make_request, so they share its rate
+    limiter and retries. Only records passing the predicate are enriched.
+    """
+
+    def __init__(self, scraper, max_workers=None, cache=None, predicate=None):
+        self.scraper = scraper
+        self.max_workers = max_workers or ENRICH_MAX_WORKERS
+        self.cache = cache if cache is not None else DetailCache()
+        self.predicate = predicate
+        self.stats = {'selected': 0, 'cache_hits': 0, 'fetched': 0, 'errors': 0}
+
+    @classmethod
+    def from_settings(cls, scraper, where=None):
+        """Enricher selecting rows by the given (or configured ENRICH_WHERE) conditions"""
+        predicates = [Predicate.parse_text(text) for text in (ENRICH_WHERE if where is None else where)]
+        if not predicates:
+            return cls(scraper)
+        return cls(scraper, predicate=lambda record: all(
+            predicate.matches(record.get(predicate.field, '')) for predicate in predicates))
+
+    def extract_details(self, html):
+        """Extract label/value pairs from an auction page
+
+        Reads <dt>/<dd> pairs and two-cell table rows (label, value).
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        details = {}
+        for term in soup.find_all('dt'):
+            value = term.find_next_sibling('dd')
+            if value is not None:
+                details[_label_key(term.text)] = value.text.strip()
+        for row in soup.find_all('tr'):
+            cells = row.find_all(['th', 'td'])
+            if len(cells) == 2:
+                key = _label_key(cells[0].text)
+                if key:
+                    details.setdefault(key, cells[1].text.strip())
+        return details
+
+    def _fetch_details(self, record):
+        """Fetch and parse one auction page"""
+        response = self.scraper._make_request(urljoin(self.scraper.base_url, record.auction_url))
+        if not response:
+            return None
+        return self.extract_details(response.text)
+
+    def enrich(self, records):
+        """Attach details to every selected record; returns enrichment statistics"""
+        to_fetch = []
+        for record in records:
+            if not record.auction_url or (self.predicate is not None and not self.predicate(record)):
+                continue
+            self.stats['selected'] += 1
+            details = self.cache.get(record)
+            if details is not None:
+                record.details = details
+                self.stats['cache_hits'] += 1
+            else:
+                to_fetch.append(record)
+
+        logger.info("Enriching %d auctions (%d from cache)...", len(to_fetch), self.stats['cache_hits'])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_record = {executor.submit(self._fetch_details, record): record for record in to_fetch}
+            for future in as_completed(future_to_record):
+                record = future_to_record[future]
+                try:
+                    details = future.result()
+                except Exception as e:
+                    logger.warning("Error enriching %s: %s", record.domain, e, extra={'error': str(e)})
+                    details = None
+                if details is None:
+                    self.stats['errors'] += 1
+                    continue
+                record.details = details
+                self.cache.put(record, details)
+                self.stats['fetched'] += 1
+
+        self.cache.save()
+        return dict(self.stats)
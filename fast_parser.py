@@ -0,0 +1,296 @@
+import hashlib
+import html
+import random
+import re
+import threading
+from config import CSV_HEADERS
+from records import DomainRecord
+from schema import SchemaResolver
+from row_filter import FilteredRows, PAST_BOUND
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Compiled patterns over the raw response bytes; no tree is ever built
+_COMMENT_RE = re.compile(rb'<!--.*?-->', re.S)
+_TABLE_RE = re.compile(rb'<table\b.*?</table\s*>', re.S | re.I)
+_ROW_RE = re.compile(rb'<tr\b[^>]*>(.*?)</tr\s*>', re.S | re.I)
+_CELL_RE = re.compile(rb'<t([dh])\b[^>]*>(.*?)</t[dh]\s*>', re.S | re.I)
+_ANCHOR_RE = re.compile(rb'<a\b([^>]*)>(.*?)</a\s*>', re.S | re.I)
+_HREF_RE = re.compile(rb'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.I)
+_TAG_RE = re.compile(rb'<[^>]*>')
+_TOTAL_RE = re.compile(rb'Showing[^<]*?out of (\d+)[^<]*?results')
+_TABLE_START_RE = re.compile(rb'<table\b', re.I)
+_TABLE_END_RE = re.compile(rb'</table\s*>', re.I)
+
+# Record attributes both extractors must agree on
+_COMPARED_FIELDS = tuple(CSV_HEADERS) + ('auction_url',)
+
+# Bytes kept between chunks while looking for the table or the results banner
+_SCAN_OVERLAP = 512
+
+
+def _text(fragment):
+    """Text content of an HTML fragment, like BeautifulSoup's .text.strip()"""
+    return html.unescape(_TAG_RE.sub(b'', fragment).decode('utf-8', 'replace')).strip()
+
+
+def _attribute(match):
+    """Unquoted value of an attribute match"""
+    value = next(group for group in match.groups() if group is not None)
+    return html.unescape(value.decode('utf-8', 'replace'))
+
+
+def _is_header(cells):
+    """Whether a row's cells include a <th>"""
+    return any(kind in (b'h', b'H') for kind, _ in cells)
+
+
+def _row_record(cells, mapping, row_filter=None):
+    """Build a record from a data row's cells
+
+    Returns None when the row has too few cells or fails the row filter,
+    and PAST_BOUND when it lies past the filter's sort bound.
+    """
+    if len(cells) < mapping.min_cells:
+        return None
+    anchor = _ANCHOR_RE.search(cells[mapping.indexes[0]][1])
+    if row_filter is None:
+        values = [_text(cells[index][1]) if index is not None else '' for index in mapping.indexes]
+        if anchor:
+            values[0] = _text(anchor.group(2))
+    else:
+        def cell_text(position):
+            if position == 0 and anchor:
+                return _text(anchor.group(2))
+            index = mapping.indexes[position]
+            return _text(cells[index][1]) if index is not None else ''
+        values = row_filter.select(cell_text)
+        if values is None or values is PAST_BOUND:
+            return values
+    href = _HREF_RE.search(anchor.group(1)) if anchor else None
+    return DomainRecord(*values, auction_url=_attribute(href) if href else '')
+
+
+class FastExtractor:
+    """Regex extractor for the auction table
+
+    Mirrors PorkbunScraper._extract_domains_from_page: columns are mapped
+    by the header row through the shared SchemaResolver, rows with a <th>
+    or too few cells for the mapping are skipped, and the optional row
+    filter is applied as each row is read.
+    """
+
+    def __init__(self, schema=None, row_filter=None):
+        self.schema = schema or SchemaResolver()
+        self.row_filter = row_filter
+
+    def extract_domains(self, content):
+        """Extract all domain data from raw page content"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        content = _COMMENT_RE.sub(b'', content)
+        table = _TABLE_RE.search(content)
+        if not table:
+            return []
+
+        rows = [_CELL_RE.findall(row.group(1)) for row in _ROW_RE.finditer(table.group(0))]
+        header = next((cells for cells in rows if _is_header(cells)), None)
+        mapping = self.schema.resolve([_text(body) for _, body in header] if header else None)
+
+        domains = []
+        scanned = 0
+        past_bound = False
+        for cells in rows:
+            if not _is_header(cells) and len(cells) >= mapping.min_cells:
+                scanned += 1
+                record = _row_record(cells, mapping, self.row_filter)
+                if record is PAST_BOUND:
+                    past_bound = True
+                elif record is not None:
+                    domains.append(record)
+        return domains if self.row_filter is None else FilteredRows(domains, scanned, past_bound)
+
+    def get_total_domains_count(self, content):
+        """Extract the total number of domains from raw page content"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        match = _TOTAL_RE.search(content)
+        return int(match.group(1)) if match else None
+
+
+def table_fingerprint(content, schema, volatile_fields=('time_left',)):
+    """Hash of the auction table's raw cells, leaving out volatile columns
+
+    Recognizes unchanged pages without building records: cells are only
+    located, never unescaped or stripped. Columns are found through the
+    schema resolver. Returns None when the page has no table.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    table = _TABLE_RE.search(_COMMENT_RE.sub(b'', content))
+    if not table:
+        return None
+    rows = [_CELL_RE.findall(row.group(1)) for row in _ROW_RE.finditer(table.group(0))]
+    header = next((cells for cells in rows if _is_header(cells)), None)
+    mapping = schema.resolve([_text(body) for _, body in header] if header else None)
+    skip = {mapping.column(field) for field in volatile_fields}
+
+    digest = hashlib.blake2b(digest_size=16)
+    for cells in rows:
+        for index, (_, body) in enumerate(cells):
+            if index not in skip:
+                digest.update(body)
+                digest.update(b'\0')
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class StreamingExtractor:
+    """Incremental version of FastExtractor for responses read in chunks
+
+    feed() returns the records of every row whose </tr> has arrived, so
+    parsing overlaps the download and the whole body is never held in
+    memory. Comments are skipped, as in FastExtractor; a row is never
+    parsed while an unterminated comment precedes its end.
+    """
+
+    def __init__(self, schema=None, parse_total=False, row_filter=None):
+        self.schema = schema or SchemaResolver()
+        self.parse_total = parse_total
+        self.row_filter = row_filter
+        self.total_domains = None
+        self.rows_scanned = 0
+        self.past_bound = False
+        self.bytes_fed = 0
+        self.buffer = b''
+        self.state = 'before_table'  # before_table, in_table, after_table
+        self.mapping = None
+
+    def feed(self, chunk):
+        """Add a chunk of the body; returns the records completed by it"""
+        self.bytes_fed += len(chunk)
+        self.buffer += chunk
+        return self._drain()
+
+    def finish(self):
+        """Signal the end of the body; returns any remaining records"""
+        records = self._drain()
+        self._find_total(self.buffer)
+        self.buffer = b''
+        return records
+
+    def _find_total(self, data):
+        """Look for the results banner in data"""
+        if self.parse_total and self.total_domains is None:
+            match = _TOTAL_RE.search(data)
+            if match:
+                self.total_domains = int(match.group(1))
+
+    def _strip_comments(self):
+        """Drop complete comments; returns where an unterminated one starts (or the buffer end)"""
+        if b'<!--' in self.buffer:
+            self.buffer = _COMMENT_RE.sub(b'', self.buffer)
+        start = self.buffer.find(b'<!--')
+        return len(self.buffer) if start < 0 else start
+
+    def _drain(self):
+        """Parse every complete row in the buffer"""
+        limit = self._strip_comments()
+        if self.state == 'before_table':
+            self._find_total(self.buffer[:limit])
+            table = _TABLE_START_RE.search(self.buffer, 0, limit)
+            if not table:
+                # Keep a tail in case the table tag or banner straddles chunks
+                keep = max(limit - _SCAN_OVERLAP, 0)
+                self.buffer = self.buffer[keep:]
+                return []
+            self.buffer = self.buffer[table.start():]
+            limit -= table.start()
+            self.state = 'in_table'
+        if self.state != 'in_table':
+            self._find_total(self.buffer[:limit])
+            self.buffer = self.buffer[max(limit - _SCAN_OVERLAP, 0):]
+            return []
+
+        records = []
+        table_end = _TABLE_END_RE.search(self.buffer, 0, limit)
+        end = table_end.start() if table_end else limit
+        position = 0
+        while True:
+            row = _ROW_RE.search(self.buffer, position, end)
+            if not row:
+                break
+            position = row.end()
+            cells = _CELL_RE.findall(row.group(1))
+            if _is_header(cells):
+                if self.mapping is None:
+                    self.mapping = self.schema.resolve([_text(body) for _, body in cells])
+                continue
+            if self.mapping is None:
+                self.mapping = self.schema.resolve(None)
+            if len(cells) < self.mapping.min_cells:
+                continue
+            self.rows_scanned += 1
+            record = _row_record(cells, self.mapping, self.row_filter)
+            if record is PAST_BOUND:
+                self.past_bound = True
+            elif record is not None:
+                records.append(record)
+
+        if table_end:
+            self.state = 'after_table'
+            self.buffer = self.buffer[table_end.end():]
+            self._find_total(self.buffer)
+        else:
+            self.buffer = self.buffer[position:]
+        return records
+
+
+class DifferentialChecker:
+    """Runs the fast extractor against BeautifulSoup on a sample of pages
+
+    The first page is always verified. Any mismatch disables the fast path
+    for the rest of the run, so a layout change falls back to BeautifulSoup.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.pages_checked = 0
+        self.mismatches = 0
+        self.fast_enabled = True
+        self.lock = threading.Lock()
+
+    def should_verify(self):
+        """Decide whether the current page is verified"""
+        return self.pages_checked == 0 or random.random() < self.sample_rate
+
+    def compare(self, url, fast_domains, reference_domains):
+        """Compare both extractors' output, disabling the fast path on mismatch"""
+        differences = []
+        if len(fast_domains) != len(reference_domains):
+            differences.append(f"row count {len(fast_domains)} != {len(reference_domains)}")
+        for index, (fast, reference) in enumerate(zip(fast_domains, reference_domains)):
+            for field in _COMPARED_FIELDS:
+                fast_value, reference_value = getattr(fast, field), getattr(reference, field)
+                if fast_value != reference_value:
+                    differences.append(f"row {index} {field}: {fast_value!r} != {reference_value!r}")
+
+        with self.lock:
+            self.pages_checked += 1
+            if differences:
+                self.mismatches += 1
+                if self.fast_enabled:
+                    self.fast_enabled = False
+                    logger.warning("Fast parser mismatch on %s, falling back to BeautifulSoup:\n%s",
+                                   url, '\n'.join(f"  {difference}" for difference in differences[:5]),
+                                   extra={'url': url})
+        return not differences
+
+    def get_stats(self):
+        """Get verification statistics"""
+        return {
+            'pages_checked': self.pages_checked,
+            'mismatches': self.mismatches,
+            'fast_enabled': self.fast_enabled
+        }
@@ -0,0 +1,160 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config import LOG_LEVEL, LOG_JSON_FILE, LOG_JSON_LEVEL
+
+# Every module logs under this logger, so one setup covers the whole scraper
+ROOT_LOGGER = 'porkbun'
+
+# Structured fields passed through `extra=` that are copied into JSON lines
+LOG_FIELDS = ('offset', 'url', 'status', 'latency_ms', 'attempt', 'rows', 'error')
+
+_listener = None
+_queue = None
+_settings = None  # Arguments of the call that configured logging, reused after a fork
+_setup_lock = threading.Lock()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread
+
+    The stock handler formats every record before queueing it, which is
+    the cost this handler exists to move off the worker threads. Records
+    never leave the process, so they can be queued as they are.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when a record is emitted, like print()"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and structured fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage().strip(),
+        }
+        for field in LOG_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level=None, json_file=None, json_level=None):
+    """Route scraper logs through a queue to a background listener thread
+
+    Worker threads only enqueue records; formatting, console output and the
+    optional JSON lines file are handled by the listener. Messages go to
+    stdout at `level`; with json_file, records at `json_level` and above
+    are also written there as JSON lines. Calling it again replaces the
+    previous configuration.
+    """
+    global _listener, _queue, _settings
+    with _setup_lock:
+        _stop()
+        _settings = (level, json_file, json_level)
+        level = logging.getLevelName(level or LOG_LEVEL)
+        json_file = json_file or LOG_JSON_FILE
+        json_level = logging.getLevelName(json_level or LOG_JSON_LEVEL)
+
+        console = _StdoutHandler()
+        console.setLevel(level)
+        console.setFormatter(logging.Formatter('%(message)s'))
+        handlers = [console]
+        if json_file:
+            json_handler = logging.FileHandler(json_file, encoding='utf-8')
+            json_handler.setLevel(json_level)
+            json_handler.setFormatter(JSONFormatter())
+            handlers.append(json_handler)
+
+        _queue = queue.Queue()
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(min(handler.level for handler in handlers))
+        logger.addHandler(_DeferredQueueHandler(_queue))
+        logger.propagate = False
+
+        _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+
+def get_logger(name):
+    """Logger for a module; logging is set up with the config defaults on first use"""
+    if _listener is None:
+        setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def flush_logs():
+    """Wait until every queued record has been written"""
+    if _queue is not None:
+        _queue.join()
+
+
+def _stop():
+    """Stop the listener after it has written every queued record"""
+    global _listener, _queue
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    _listener = None
+    _queue = None
+
+
+def shutdown_logging():
+    """Write any queued records and stop the listener thread"""
+    with _setup_lock:
+        _stop()
+
+
+def _restart_after_fork():
+    """Give a forked child (e.g. a process pool worker) its own listener
+
+    The child inherits the parent's queue handler but not its listener
+    thread, so records logged there would never be written.
+    """
+    global _listener, _queue, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    _listener = None
+    _queue = None
+    setup_logging(*_settings)
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -11,6 +11,7 @@ from scraper import PorkbunScraper
 from csv_writer import CSVWriter
 from config import SEARCH_PARAMS
 from progress_utils import AutoFlushWriter
+from row_filter import SORT_FIELDS
 
 def print_banner():
     """Print the application banner"""
@@ -183,6 +184,12 @@ def get_search_parameters():
     if sort_dir in ['desc', 'd']:
         params['sortDirection'] = 'descending'
     
+    # Sorted by a value, the crawl can stop once results pass a bound
+    if params.get('sortName') in SORT_FIELDS:
+        stop_at = input("Stop after this sort value (e.g. 50 or 1h, leave blank to scrape all): ").strip()
+        if stop_at:
+            params['stop_at'] = stop_at
+    
     return params
 
 def validate_output(filename):
@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from records import DomainRecord, RECORD_FIELDS, format_time_left
+from config import PAGE_CACHE_FILE
+
+# Commit the cache after this many stored pages
+_COMMIT_INTERVAL = 50
+
+
+class PageCache:
+    """Table fingerprints and parsed records of previously seen pages, keyed by URL
+
+    Kept in SQLite so a re-crawl only rewrites the pages that changed.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or PAGE_CACHE_FILE
+        self.connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, fingerprint TEXT, records TEXT)")
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.uncommitted = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, url, fingerprint, fetched_at):
+        """The stored records when the page's fingerprint is unchanged, else None
+
+        Reused records keep their end_time; time_left is re-derived from it
+        and fetched_at, since it is excluded from the fingerprint.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT fingerprint, records FROM pages WHERE url = ?", (url,)).fetchone()
+        records = self._decode(row[1], fetched_at) if row is not None and row[0] == fingerprint else None
+        with self.lock:
+            if records is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return records
+
+    def _decode(self, payload, fetched_at):
+        """Records from a stored payload, or None when stored with another record layout"""
+        records = []
+        for values in json.loads(payload):
+            if len(values) != len(RECORD_FIELDS) + 1:
+                return None
+            record = DomainRecord(*values[:-1], auction_url=values[-1])
+            if record.end_time:
+                remaining = datetime.fromisoformat(record.end_time) - fetched_at
+                record.time_left = format_time_left(remaining / timedelta(seconds=1))
+            records.append(record)
+        return records
+
+    def store(self, url, fingerprint, records):
+        """Remember a freshly parsed page"""
+        payload = json.dumps([record.to_row() + [record.auction_url] for record in records])
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (url, fingerprint, records) VALUES (?, ?, ?)",
+                (url, fingerprint, payload))
+            self.uncommitted += 1
+            if self.uncommitted >= _COMMIT_INTERVAL:
+                self.connection.commit()
+                self.uncommitted = 0
+
+    def commit(self):
+        """Write pending pages to disk"""
+        with self.lock:
+            self.connection.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+    def get_stats(self):
+        """Get reuse statistics"""
+        return {'pages_reused': self.hits, 'pages_changed': self.misses}
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from csv_writer import CSVWriter, open_input
+from domain_index import domain_hash
+from sinks import Sink
+from log_utils import get_logger
+from config import (
+    PARTITION_BY, PARTITION_OUTPUT_DIR, PARTITION_BUCKETS, PARTITION_WRITERS, OUTPUT_COMPRESSION
+)
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+_UNSAFE_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def _file_summary(path):
+    """Row count and sha256 of a partition file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    with open_input(path) as f:
+        rows = max(sum(1 for _ in f) - 1, 0)  # Without the header row
+    return {'rows': rows, 'bytes': os.path.getsize(path), 'sha256': digest.hexdigest()}
+
+
+class _PartitionWorker(Sink):
+    """Writer thread owning a fixed subset of the partitions, one CSVWriter each"""
+
+    def __init__(self, index, owner, queue_size=None):
+        super().__init__(queue_size)
+        self.name = f"partition-writer-{index}"
+        self.owner = owner
+        self.writers = {}  # partition key -> open CSVWriter
+        self.rows_by_key = {}  # partition key -> rows written in this run
+        self.summaries = {}
+
+    def _write_batch(self, batch):
+        groups = {}
+        for key, record in batch:
+            groups.setdefault(key, []).append(record)
+        for key, records in groups.items():
+            writer = self.writers.get(key)
+            if writer is None:
+                writer = self.writers[key] = CSVWriter(self.owner.partition_path(key), self.owner.compression)
+                writer.open()
+            writer.writer.writerows([writer._format_row(record) for record in records])
+            self.rows_by_key[key] = self.rows_by_key.get(key, 0) + len(records)
+
+    def _flush(self):
+        for writer in self.writers.values():
+            writer.flush()
+
+    def _close(self):
+        for key, writer in self.writers.items():
+            writer.close()
+            self.summaries[key] = {'rows_written': self.rows_by_key.get(key, 0), **_file_summary(writer.filename)}
+
+
+class PartitionedWriter:
+    """Writes one CSV per TLD or domain-hash bucket, plus a manifest
+
+    Partitions are spread over a pool of writer threads, each with its own
+    bounded queue; a partition is only ever touched by its owning thread.
+    On close, manifest.json lists every partition written in this run with
+    its file, the rows written in this run and the whole file's row count,
+    size and sha256 (files are appended to across runs). Has the CSVWriter
+    write interface, so it can be passed as csv_writer to scrape_all_pages().
+    """
+
+    def __init__(self, output_dir=None, partition_by=None, buckets=None, writers=None,
+                 compression=None, queue_size=None):
+        self.output_dir = output_dir or PARTITION_OUTPUT_DIR
+        self.partition_by = partition_by or PARTITION_BY or 'tld'
+        if self.partition_by not in ('tld', 'hash'):
+            raise ValueError(f"Unknown partitioning '{self.partition_by}', expected 'tld' or 'hash'")
+        self.buckets = buckets or PARTITION_BUCKETS
+        self.compression = compression or OUTPUT_COMPRESSION
+        self.extension = {'gzip': '.csv.gz', 'zstd': '.csv.zst'}.get(self.compression, '.csv')
+        self.workers = [_PartitionWorker(i, self, queue_size) for i in range(writers or PARTITION_WRITERS)]
+        self.filename = self.output_dir
+        self.manifest_file = os.path.join(self.output_dir, MANIFEST_FILE)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def partition_key(self, record):
+        """Partition a record belongs to"""
+        if self.partition_by == 'tld':
+            return record.get('tld') or 'unknown'
+        return f"bucket-{domain_hash(record.get('domain', '')) % self.buckets:03d}"
+
+    def partition_path(self, key):
+        """File of a partition"""
+        return os.path.join(self.output_dir, _UNSAFE_RE.sub('_', key) + self.extension)
+
+    def _worker_for(self, key):
+        """Writer thread owning a partition (stable across runs)"""
+        return self.workers[zlib.crc32(key.encode('utf-8')) % len(self.workers)]
+
+    def open(self):
+        """Create the output directory and start the writer threads"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        for worker in self.workers:
+            worker.open()
+        logger.info("Partitioned output (%s) opened: %s", self.partition_by, self.output_dir)
+
+    def write_multiple_domains(self, domains_data):
+        """Queue a batch of domain records, split by owning writer thread"""
+        batches = {}
+        for record in domains_data:
+            key = self.partition_key(record)
+            batches.setdefault(self._worker_for(key), []).append((key, record))
+        for worker, batch in batches.items():
+            worker.submit(batch)
+        return sum(len(batch) for batch in batches.values())
+
+    def write_domain_data(self, domain_data):
+        """Queue a single domain's data for writing"""
+        return self.write_multiple_domains([domain_data]) == 1
+
+    def write_domain(self, domain_data):
+        """Alias of write_domain_data used by AutoFlushWriter"""
+        return self.write_domain_data(domain_data)
+
+    def flush(self):
+        """Wait until every writer thread has written its queued batches"""
+        for worker in self.workers:
+            worker.flush()
+
+    def close(self):
+        """Stop the writer threads, then summarize the partitions (in parallel) into the manifest"""
+        errors = []
+
+        def close_worker(worker):
+            try:
+                worker.close()
+            except Exception as e:
+                errors.append(e)
+
+        with ThreadPoolExecutor(max_workers=len(self.workers)) as executor:
+            list(executor.map(close_worker, self.workers))
+        self.write_manifest()
+        if errors:
+            raise errors[0]
+
+    def write_manifest(self):
+        """Write manifest.json describing the partitions written in this run
+
+        rows_written counts this run's rows; rows and total_rows count every
+        row in the files, including earlier runs appended to them.
+        """
+        partitions = {}
+        for worker in self.workers:
+            for key, summary in worker.summaries.items():
+                partitions[key] = {'file': os.path.basename(self.partition_path(key)), **summary}
+        manifest = {
+            'partition_by': self.partition_by,
+            'buckets': self.buckets if self.partition_by == 'hash' else None,
+            'written_at': datetime.now().isoformat(timespec='seconds'),
+            'total_rows_written': sum(partition['rows_written'] for partition in partitions.values()),
+            'total_rows': sum(partition['rows'] for partition in partitions.values()),
+            'partitions': dict(sorted(partitions.items())),
+        }
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info("Partition manifest written: %s (%d partitions)", self.manifest_file, len(partitions))
+        return manifest
+
+    def get_stats(self):
+        """Throughput statistics per writer thread"""
+        return {worker.name: worker.get_stats() for worker in self.workers}
@@ -1,7 +1,13 @@
 import sys
 import json
 import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from config import (
+    PROGRESS_BAR_WIDTH, PROGRESS_MODE, PROGRESS_REFRESH_INTERVAL, PROGRESS_RATE_WINDOW
+)
 
 class ProgressBar:
     """Simple console progress bar for tracking scraping progress"""
@@ -55,6 +61,142 @@ class ProgressBar:
         self.update(self.total)
         print()  # New line
 
+class ProgressTracker:
+    """Concurrency-aware progress reporting rendered from a background ticker
+
+    Each worker thread increments its own counters, so the hot loop never
+    takes a lock or touches stdout. A ticker thread sums the counters at a
+    fixed rate and renders a bar (TTY), a JSON line per tick, or nothing.
+    The rate and ETA use a moving window rather than the whole-run average.
+    """
+
+    MODES = ('bar', 'json', 'quiet')
+
+    def __init__(self, total=None, mode=None, interval=None, window=None, width=None, stream=None):
+        self.total = total
+        self.stream = stream or sys.stdout
+        mode = mode or PROGRESS_MODE
+        if mode == 'auto':
+            mode = 'bar' if self.stream.isatty() else 'quiet'
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown progress mode: {mode}")
+        self.mode = mode
+        self.interval = interval or PROGRESS_REFRESH_INTERVAL
+        self.window = window or PROGRESS_RATE_WINDOW
+        self.width = width or PROGRESS_BAR_WIDTH
+        self.local = threading.local()
+        self.counters = []  # One [pages, domains, errors] list per worker thread
+        self.register_lock = threading.Lock()
+        self.samples = deque()  # (timestamp, domains) within the rate window
+        self.start_time = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.finish()
+
+    def _thread_counters(self):
+        """Counters owned by the calling thread, registered on first use"""
+        counters = getattr(self.local, 'counters', None)
+        if counters is None:
+            counters = [0, 0, 0]
+            with self.register_lock:
+                self.counters.append(counters)
+            self.local.counters = counters
+        return counters
+
+    def add(self, pages=0, domains=0, errors=0):
+        """Record completed work from any thread"""
+        counters = self._thread_counters()
+        counters[0] += pages
+        counters[1] += domains
+        counters[2] += errors
+
+    def set_total(self, total):
+        """Set or update the expected number of domains"""
+        self.total = total
+
+    def totals(self):
+        """Sum the per-thread counters"""
+        with self.register_lock:
+            counters = list(self.counters)
+        pages = domains = errors = 0
+        for counter in counters:
+            pages += counter[0]
+            domains += counter[1]
+            errors += counter[2]
+        return pages, domains, errors
+
+    def snapshot(self):
+        """Current progress with moving-window rate and ETA"""
+        now = time.monotonic()
+        pages, domains, errors = self.totals()
+        self.samples.append((now, domains))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        oldest_time, oldest_domains = self.samples[0]
+        rate = (domains - oldest_domains) / (now - oldest_time) if now > oldest_time else 0.0
+        eta = None
+        if self.total and rate > 0:
+            eta = max(0.0, (self.total - domains) / rate)
+        return {
+            'pages': pages,
+            'domains': domains,
+            'errors': errors,
+            'total': self.total,
+            'rate': round(rate, 1),
+            'eta_seconds': round(eta) if eta is not None else None,
+            'elapsed_seconds': round(now - self.start_time, 1) if self.start_time else 0.0,
+        }
+
+    def _render(self, final=False):
+        """Write one progress update in the configured mode"""
+        snapshot = self.snapshot()
+        if self.mode == 'json':
+            self.stream.write(json.dumps(snapshot) + '\n')
+        elif self.mode == 'bar':
+            total = snapshot['total']
+            percentage = min(100, snapshot['domains'] * 100 // total) if total else 0
+            filled_width = self.width * percentage // 100
+            bar = '=' * filled_width + '-' * (self.width - filled_width)
+            eta = snapshot['eta_seconds']
+            eta_text = f" ETA: {eta // 3600}:{eta % 3600 // 60:02d}:{eta % 60:02d}" if eta is not None and not final else ""
+            self.stream.write(
+                f"\r[{bar}] {percentage:3d}% ({snapshot['domains']}/{total or '?'}) "
+                f"{snapshot['rate']:.1f} domains/s errors: {snapshot['errors']}{eta_text}   "
+            )
+            if final:
+                self.stream.write('\n')
+        self.stream.flush()
+
+    def _run(self):
+        """Ticker thread loop"""
+        while not self.stop_event.wait(self.interval):
+            self._render()
+
+    def start(self):
+        """Start the background ticker"""
+        self.start_time = time.monotonic()
+        self.samples.clear()
+        self.samples.append((self.start_time, 0))
+        if self.mode != 'quiet':
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="progress", daemon=True)
+            self.thread.start()
+
+    def finish(self):
+        """Stop the ticker and render the final state"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+            self._render(final=True)
+        return self.snapshot()
+
 class StateManager:
     """Manages saving and loading scraping state for resumption"""
     
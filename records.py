@@ -0,0 +1,122 @@
+import re
+import sys
+from config import CSV_HEADERS
+
+RECORD_FIELDS = tuple(CSV_HEADERS)
+
+
+class DomainRecord:
+    """Compact auction row passed between the scrapers and the writers
+
+    Uses __slots__ instead of a per-row dict and interns the TLD string.
+    Supports the read-only dict interface (get, [], keys, items) so code
+    written against the old dict rows keeps working; to_dict() converts.
+    """
+
+    __slots__ = RECORD_FIELDS + ('page_offset', 'auction_url', 'details')
+
+    def __init__(self, *values, page_offset=None, auction_url='', details=None):
+        for field, value in zip(RECORD_FIELDS, values):
+            setattr(self, field, value)
+        for field in RECORD_FIELDS[len(values):]:
+            setattr(self, field, '')
+        self.tld = sys.intern(self.tld)
+        self.page_offset = page_offset
+        self.auction_url = auction_url  # Link from the domain cell, as found in the page
+        self.details = details  # Extra fields from the auction page, filled in by enrichment
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a dict keyed by CSV header"""
+        return cls(*(data.get(field, '') for field in RECORD_FIELDS),
+                   page_offset=data.get('_page_offset'), auction_url=data.get('auction_url', ''))
+
+    def to_dict(self):
+        """Convert to the dict format used before records existed"""
+        return {field: getattr(self, field) for field in RECORD_FIELDS}
+
+    def to_row(self):
+        """Field values in CSV_HEADERS order"""
+        return [getattr(self, field) for field in RECORD_FIELDS]
+
+    def get(self, key, default=None):
+        if key in RECORD_FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in RECORD_FIELDS
+
+    def keys(self):
+        return RECORD_FIELDS
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in RECORD_FIELDS]
+
+    def __eq__(self, other):
+        if isinstance(other, DomainRecord):
+            return self.to_row() == other.to_row()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"DomainRecord({self.to_dict()!r})"
+
+
+_NUMBER_RE = re.compile(r'-?\d[\d,]*(?:\.\d+)?|-?\.\d+')
+_SUFFIXES = {'k': 1e3, 'm': 1e6, 'b': 1e9}
+
+
+def parse_number(text):
+    """Parse a display value like '$1,234.50', '16 years' or '1.2K' to a float
+
+    Returns None when the text holds no number.
+    """
+    if not text:
+        return None
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+    value = float(match.group(0).replace(',', ''))
+    suffix = text[match.end():match.end() + 1].lower()
+    return value * _SUFFIXES.get(suffix, 1)
+
+
+_DURATION_RE = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(d|days?|h|hrs?|hours?|m|mins?|minutes?|s|secs?|seconds?)\b', re.I)
+_DURATION_UNITS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+
+def format_time_left(seconds):
+    """Format a number of seconds like the time_left column ('3d 4h', '2h 15m', '40m')"""
+    if seconds <= 0:
+        return 'Ended'
+    minutes = int(seconds // 60)
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+def parse_time_left(text):
+    """Parse a time_left value like '7d 11h' or '2 hours 5 min' to seconds
+
+    Returns 0 for an ended auction and None when the text holds no duration.
+    """
+    if not text:
+        return None
+    matches = _DURATION_RE.findall(text)
+    if not matches:
+        return 0 if 'ended' in text.lower() else None
+    return sum(float(amount) * _DURATION_UNITS[unit[0].lower()] for amount, unit in matches)
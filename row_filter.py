@@ -0,0 +1,205 @@
+import operator
+import re
+from config import CSV_HEADERS, ROW_FILTERS, OUTPUT_FIELDS, SORT_STOP_AT
+from records import parse_number, parse_time_left
+from schema import TABLE_FIELDS
+
+_PREDICATE_RE = re.compile(r'^\s*([a-z_]+)\s*(==|!=|<=|>=|=|<|>|~)\s*(.*?)\s*$')
+
+_COMPARISONS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+# Sort keys whose order a bound can be checked against, with the table field they sort by
+SORT_FIELDS = {
+    'startPrice': 'starting_price',
+    'currentBid': 'current_bid',
+    'bids': 'bids_count',
+    'endTime': 'time_left',
+}
+
+# Returned by RowFilter.select for a row past the sort bound
+PAST_BOUND = object()
+
+
+class Predicate:
+    """One condition on a table field, like 'current_bid<20' or 'tld==com'
+
+    <, <=, >, >= compare numbers: time_left is read as a duration ('1h',
+    '2d 4h') and other fields with parse_number. == and != compare numbers
+    when the value is numeric and text (case-insensitively) otherwise; ~
+    matches a substring. Rows whose value can't be read as a number never
+    match a numeric comparison.
+    """
+
+    def __init__(self, field, op, value):
+        if field not in TABLE_FIELDS:
+            raise ValueError(f"Unknown filter field '{field}', expected one of {TABLE_FIELDS}")
+        if op not in _COMPARISONS and op != '~':
+            raise ValueError(f"Unknown filter operator '{op}'")
+        self.field = field
+        self.op = op
+        self.value = value
+        self.position = TABLE_FIELDS.index(field)
+        self.parse = parse_time_left if field == 'time_left' else parse_number
+        self.number = None if op == '~' else self.parse(value)
+        if op in ('<', '<=', '>', '>=') and self.number is None:
+            raise ValueError(f"Filter '{self}' needs a numeric value")
+        self.text = value.lower()
+
+    @classmethod
+    def parse_text(cls, text):
+        """Parse 'field op value'"""
+        match = _PREDICATE_RE.match(text)
+        if not match:
+            raise ValueError(f"Can't parse filter '{text}', expected e.g. 'current_bid<20'")
+        return cls(*match.groups())
+
+    def matches(self, text):
+        """Whether a cell's text satisfies the condition"""
+        if self.op == '~':
+            return self.text in text.lower()
+        if self.number is None:
+            return _COMPARISONS[self.op](text.lower(), self.text)
+        value = self.parse(text)
+        return value is not None and _COMPARISONS[self.op](value, self.number)
+
+    def __str__(self):
+        return f"{self.field}{self.op}{self.value}"
+
+
+class SortBound:
+    """Last value of the active sort key the crawl is interested in
+
+    Results sorted by the key arrive in order, so once a row is past the
+    bound (above it when ascending, below it when descending) every later
+    row is too. Rows whose value can't be read are never past it.
+    """
+
+    def __init__(self, sort_name, sort_direction, value):
+        if sort_name not in SORT_FIELDS:
+            raise ValueError(f"Can't stop at a bound when sorting by '{sort_name}', "
+                             f"expected one of {tuple(SORT_FIELDS)}")
+        self.field = SORT_FIELDS[sort_name]
+        self.position = TABLE_FIELDS.index(self.field)
+        self.descending = sort_direction == 'descending'
+        self.value = str(value)
+        self.parse = parse_time_left if self.field == 'time_left' else parse_number
+        self.limit = self.parse(self.value)
+        if self.limit is None:
+            raise ValueError(f"Sort bound '{self.value}' for {sort_name} isn't a number")
+
+    @classmethod
+    def from_settings(cls, search_params, stop_at=None):
+        """Bound on the search's sort key for the given (or configured) value, or None"""
+        stop_at = SORT_STOP_AT if stop_at is None else stop_at
+        if stop_at in (None, ''):
+            return None
+        return cls(search_params.get('sortName'), search_params.get('sortDirection'), stop_at)
+
+    def passed(self, text):
+        """Whether a cell's value lies past the bound"""
+        value = self.parse(text)
+        if value is None:
+            return False
+        return value < self.limit if self.descending else value > self.limit
+
+    def __str__(self):
+        return f"{self.field}{'>=' if self.descending else '<='}{self.value}"
+
+
+def output_fields(fields=None):
+    """Projected output columns in CSV_HEADERS order, always including domain"""
+    fields = OUTPUT_FIELDS if fields is None else fields
+    if not fields:
+        return tuple(CSV_HEADERS)
+    unknown = [field for field in fields if field not in CSV_HEADERS]
+    if unknown:
+        raise ValueError(f"Unknown output fields {unknown}, expected some of {CSV_HEADERS}")
+    return tuple(field for field in CSV_HEADERS if field == 'domain' or field in fields)
+
+
+class RowFilter:
+    """Predicates and column projection applied while rows are extracted
+
+    Only the cells the predicates test are read first; a row that fails is
+    dropped before anything else is built, and a row that passes only has
+    its projected cells read. Fields that aren't projected stay blank.
+    With a sort bound, the sort key's cell is checked before anything else
+    and rows past it are reported as PAST_BOUND.
+    """
+
+    def __init__(self, where=None, fields=None, bound=None):
+        self.where = [str(predicate) for predicate in where or []]
+        self.predicates = [Predicate.parse_text(text) for text in self.where]
+        self.fields = output_fields(fields)
+        self.bound = bound
+
+        needed = set(self.fields)
+        if 'end_time' in needed:
+            needed.add('time_left')  # end_time is derived from time_left
+        tested = {predicate.position for predicate in self.predicates}
+        self.test_positions = sorted(tested)
+        self.read_positions = [position for position, field in enumerate(TABLE_FIELDS)
+                               if field in needed and position not in tested]
+
+    @classmethod
+    def from_settings(cls, where=None, fields=None, bound=None):
+        """Filter for the given (or configured) settings, or None when there is nothing to do"""
+        where = ROW_FILTERS if where is None else where
+        fields = OUTPUT_FIELDS if fields is None else fields
+        if not where and not fields and bound is None:
+            return None
+        return cls(where, fields, bound)
+
+    def select(self, cell_text):
+        """Table field values of a matching row, None when it doesn't match,
+        or PAST_BOUND when it lies past the sort bound
+
+        cell_text(position) returns the text of the cell for TABLE_FIELDS[position].
+        """
+        if self.bound is not None and self.bound.passed(cell_text(self.bound.position)):
+            return PAST_BOUND
+        values = [''] * len(TABLE_FIELDS)
+        for position in self.test_positions:
+            values[position] = cell_text(position)
+        for predicate in self.predicates:
+            if not predicate.matches(values[predicate.position]):
+                return None
+        for position in self.read_positions:
+            values[position] = cell_text(position)
+        return values
+
+    def describe(self):
+        """Short summary for logs"""
+        parts = []
+        if self.predicates:
+            parts.append(' and '.join(self.where))
+        if self.bound is not None:
+            parts.append(f"stop past {self.bound}")
+        if self.fields != tuple(CSV_HEADERS):
+            parts.append(f"fields {', '.join(self.fields)}")
+        return '; '.join(parts)
+
+
+class FilteredRows(list):
+    """Records of a page that passed the row filter, with the number of rows
+    scanned and whether any of them lay past the sort bound"""
+
+    def __init__(self, records=(), rows_scanned=0, past_bound=False):
+        super().__init__(records)
+        self.rows_scanned = rows_scanned
+        self.past_bound = past_bound
+
+
+def rows_scanned(domains):
+    """Data rows a page held before filtering (len(domains) when nothing was filtered, 0 for None)"""
+    if domains is None:
+        return 0
+    return getattr(domains, 'rows_scanned', len(domains))
+
+
+def past_bound(domains):
+    """Whether a page reached rows past the sort bound, so no later page is needed"""
+    return getattr(domains, 'past_bound', False)
@@ -7,9 +7,18 @@ import sys
 import os
 from datetime import datetime
 from scraper_mt import PorkbunScraper
-from csv_writer import CSVWriter
-from config import SEARCH_PARAMS
+from end_time_index import build_end_time_index
+from domain_index import build_domain_index
+from sinks import FanOutWriter, BackgroundCSVWriter, CSVSink, JSONLSink, SQLiteSink
+from partitioned_writer import PartitionedWriter
+from config import (
+    SEARCH_PARAMS, OUTPUT_JSONL_FILE, OUTPUT_SQLITE_FILE, PARTITION_BY, ENRICH_DETAILS, ENRICH_OUTPUT_FILE
+)
 from progress_utils import AutoFlushWriter
+from row_filter import SORT_FIELDS
+from aggregates import TLDAggregator
+from enrichment import DetailEnricher
+from autotune import load_profile
 
 def print_banner():
     """Print application banner"""
@@ -77,8 +86,38 @@ def get_search_parameters():
     if sort_dir in ['desc', 'd']:
         params['sortDirection'] = 'descending'
     
+    # Sorted by a value, the crawl can stop once results pass a bound
+    if params.get('sortName') in SORT_FIELDS:
+        stop_at = input("Stop after this sort value (e.g. 50 or 1h, leave blank to scrape all): ").strip()
+        if stop_at:
+            params['stop_at'] = stop_at
+    
     return params
 
+def create_writer():
+    """Background CSV writer, partitioned output, or a fan-out over every configured output"""
+    if PARTITION_BY:
+        return PartitionedWriter()
+    if not (OUTPUT_JSONL_FILE or OUTPUT_SQLITE_FILE):
+        return BackgroundCSVWriter()
+    sinks = [CSVSink()]
+    if OUTPUT_JSONL_FILE:
+        sinks.append(JSONLSink(OUTPUT_JSONL_FILE))
+    if OUTPUT_SQLITE_FILE:
+        sinks.append(SQLiteSink(OUTPUT_SQLITE_FILE))
+    return FanOutWriter(sinks)
+
+def enrich_details(scraper, domains):
+    """Fetch auction page details for the rows selected by ENRICH_WHERE and write them as JSON lines"""
+    enricher = DetailEnricher.from_settings(scraper)
+    stats = enricher.enrich(domains)
+    enriched = [record for record in domains if record.details]
+    with JSONLSink(ENRICH_OUTPUT_FILE) as sink:
+        if enriched:
+            sink.submit(enriched)
+    print(f"  Enriched {len(enriched)} auctions ({stats['fetched']} fetched, {stats['cache_hits']} cached, "
+          f"{stats['errors']} errors) -> {ENRICH_OUTPUT_FILE}")
+
 def validate_environment():
     """Validate that the environment is set up correctly"""
     try:
@@ -109,9 +148,16 @@ def main():
         max_pages = int(limit_pages)
         print(f"Limiting scraping to {max_pages} pages")
     
+    # Use the worker count recommended by autotune.py when a profile exists
+    profile = load_profile()
+    max_workers = profile.get('max_workers', 10)
+    if profile:
+        print(f"Using tuning profile: {profile}")
+    
     # Initialize components with multithreading and search parameters
-    scraper = PorkbunScraper(max_workers=10, max_pages=max_pages, **search_params)
-    csv_writer = CSVWriter()
+    scraper = PorkbunScraper(max_workers=max_workers, max_pages=max_pages, **search_params)
+    csv_writer = create_writer()
+    aggregator = TLDAggregator()
     
     try:
         # Open CSV file
@@ -119,13 +165,18 @@ def main():
             print("Starting full scraping with multithreading...")
             print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
-            # Scrape all pages
-            all_domains, total_domains = scraper.scrape_all_pages(max_workers=10, csv_writer=csv_writer)
+            # Scrape all pages, streaming each completed page to the background writer
+            # and updating the per-TLD aggregates as pages are parsed
+            all_domains, total_domains = scraper.scrape_all_pages(
+                max_workers=max_workers, csv_writer=csv_writer, on_page=aggregator.add_page)
+            aggregator.save()
+            
+            # Optional auction page details for a subset of rows, written next to the CSV
+            if ENRICH_DETAILS and all_domains:
+                enrich_details(scraper, all_domains)
             
-            # Write all data to CSV
             if all_domains:
-                success_count = csv_writer.write_multiple_domains(all_domains)
-                print(f"\n✓ Successfully wrote {success_count} domains to CSV")
+                print(f"\n✓ Successfully queued {len(all_domains)} domains for CSV output")
                 
                 # Show statistics
                 stats = scraper.get_scraping_stats()
@@ -152,6 +203,16 @@ def main():
         print(f"\n✗ Error during scraping: {e}")
         return False
     
+    # Sidecar indexes for ending-soon and per-domain lookups (need byte offsets, so plain CSV only)
+    if csv_writer.compression and not PARTITION_BY:
+        print(f"Skipping end time and domain indexes: {csv_writer.filename} is {csv_writer.compression}-compressed")
+    elif not PARTITION_BY:
+        for name, build_index in (('end time', build_end_time_index), ('domain', build_domain_index)):
+            try:
+                build_index(csv_writer.filename)
+            except ValueError as e:
+                print(f"Warning: {name} index not built: {e}")
+    
     print(f"\nEnd time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     return True
 
@@ -0,0 +1,134 @@
+import re
+import threading
+from config import COLUMN_HEADERS, SCHEMA_DRIFT
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Fields read from table columns, in the expected column order (derived fields like end_time follow)
+TABLE_FIELDS = tuple(COLUMN_HEADERS)
+
+# Fields a page can't be used without, whatever the drift policy
+REQUIRED_FIELDS = ('domain',)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9#]+')
+
+
+class SchemaDriftError(ValueError):
+    """The auction table's columns no longer match what the scraper expects"""
+
+
+def normalize_header(text):
+    """Lowercase a header cell's text, dropping sort arrows and punctuation"""
+    return _NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+class ColumnMapping:
+    """Cell index of each CSV field, resolved from a table header row
+
+    Fields with no matching header map to None and are written blank.
+    """
+
+    def __init__(self, headers, indexes, source='header'):
+        self.headers = tuple(headers)
+        self.indexes = tuple(indexes)  # In TABLE_FIELDS order
+        self.source = source
+        self.missing = tuple(field for field, index in zip(TABLE_FIELDS, self.indexes) if index is None)
+        mapped = set(index for index in self.indexes if index is not None)
+        self.extra = tuple(header for i, header in enumerate(self.headers) if header and i not in mapped)
+        self.min_cells = max(mapped) + 1 if mapped else 0
+
+    @classmethod
+    def from_headers(cls, headers):
+        """Map fields to columns by header name"""
+        headers = [normalize_header(header) for header in headers]
+        indexes = []
+        for field in TABLE_FIELDS:
+            names = COLUMN_HEADERS[field]
+            indexes.append(next((i for i, header in enumerate(headers) if header in names), None))
+        return cls(headers, indexes)
+
+    @classmethod
+    def positional(cls):
+        """The expected layout: field N in column N (used when a table has no header row)"""
+        headers = [COLUMN_HEADERS[field][0] for field in TABLE_FIELDS]
+        return cls(headers, range(len(TABLE_FIELDS)), source='positional')
+
+    def column(self, field):
+        """Cell index of a field, or None when the table has no such column"""
+        return self.indexes[TABLE_FIELDS.index(field)]
+
+    @property
+    def drifted(self):
+        """Whether the columns differ from the expected layout"""
+        return bool(self.missing or self.extra) or self.indexes != tuple(range(len(TABLE_FIELDS)))
+
+    def describe(self):
+        """One-line description of how the layout differs from the expected one"""
+        parts = []
+        moved = [f"{field}->{index}" for position, (field, index) in enumerate(zip(TABLE_FIELDS, self.indexes))
+                 if index is not None and index != position]
+        if moved:
+            parts.append(f"moved columns {', '.join(moved)}")
+        if self.missing:
+            parts.append(f"missing {', '.join(self.missing)}")
+        if self.extra:
+            parts.append(f"unknown headers {', '.join(repr(header) for header in self.extra)}")
+        return '; '.join(parts) or 'matches the expected layout'
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'headers': list(self.headers),
+            'columns': {field: index for field, index in zip(TABLE_FIELDS, self.indexes)},
+            'missing': list(self.missing),
+            'extra': list(self.extra),
+        }
+
+
+class SchemaResolver:
+    """Resolves and caches the column mapping for each distinct header row
+
+    The first page's header is normally the only one seen, so mapping
+    happens once per run. A header that drifts from COLUMN_HEADERS raises
+    SchemaDriftError under the 'fail' policy; under 'adapt' it is mapped
+    by name with a warning.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy or SCHEMA_DRIFT
+        if self.policy not in ('adapt', 'fail'):
+            raise ValueError(f"Unknown schema drift policy '{self.policy}', expected 'adapt' or 'fail'")
+        self.mappings = {}  # header tuple (or None) -> ColumnMapping
+        self.current = None
+        self.lock = threading.Lock()
+
+    def resolve(self, headers):
+        """Mapping for a header row (a list of header cell texts, or None when the table has none)"""
+        key = tuple(headers) if headers else None
+        mapping = self.mappings.get(key)
+        if mapping is not None:
+            return mapping
+
+        with self.lock:
+            mapping = self.mappings.get(key)
+            if mapping is not None:
+                return mapping
+            mapping = ColumnMapping.from_headers(headers) if headers else ColumnMapping.positional()
+            if mapping.source == 'header' and len(mapping.missing) == len(TABLE_FIELDS):
+                # No header text recognized at all (icons, another language)
+                if self.policy == 'fail':
+                    raise SchemaDriftError(f"No known column headers in {list(mapping.headers)}")
+                logger.warning("No known column headers in %s, using column positions", list(mapping.headers))
+                mapping = ColumnMapping.positional()
+            missing_required = [field for field in REQUIRED_FIELDS if field in mapping.missing]
+            if missing_required:
+                raise SchemaDriftError(f"Auction table has no {', '.join(missing_required)} column "
+                                       f"(headers: {list(mapping.headers)})")
+            if mapping.drifted:
+                if self.policy == 'fail':
+                    raise SchemaDriftError(f"Auction table layout changed: {mapping.describe()}")
+                logger.warning("Auction table layout changed (%s), mapping columns by name", mapping.describe())
+            self.mappings[key] = mapping
+            self.current = mapping
+        return mapping
@@ -1,28 +1,61 @@
+import asyncio
 import requests
 import time
-import random
 import re
 import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from config import (
-    BASE_URL, HEADERS, REQUEST_DELAY_MIN, REQUEST_DELAY_MAX,
-    MAX_RETRIES, RETRY_DELAY, DOMAINS_PER_PAGE, MAX_PAGES_TO_PROCESS,
-    SEARCH_PARAMS, SEARCH_QUERY, MAX_PAGES_LIMIT,
-    PROGRESS_BAR_WIDTH, PROGRESS_UPDATE_INTERVAL, AUTO_FLUSH_INTERVAL, STATE_FILE
+    BASE_URL, HEADERS, MAX_RETRIES, RETRY_DELAY, DOMAINS_PER_PAGE, MAX_PAGES_TO_PROCESS,
+    SEARCH_PARAMS, SEARCH_QUERY, MAX_PAGES_LIMIT, FAST_PARSER, PARSER_VERIFY_SAMPLE_RATE,
+    AUTO_FLUSH_INTERVAL, STATE_FILE, REQUESTS_PER_SECOND, SERIAL_REQUESTS_PER_SECOND,
+    EXECUTOR, STREAM_RESPONSES, STREAM_CHUNK_SIZE, PAGE_CACHE, PAGE_SIZE_PARAM
 )
 from urllib.parse import urlencode
-from progress_utils import ProgressBar, StateManager, AutoFlushWriter
+from fast_parser import FastExtractor, StreamingExtractor, DifferentialChecker, table_fingerprint
+from records import DomainRecord, parse_time_left
+from schema import SchemaResolver, SchemaDriftError
+from page_cache import PageCache
+from row_filter import RowFilter, SortBound, FilteredRows, PAST_BOUND, rows_scanned, past_bound
+from progress_utils import StateManager, AutoFlushWriter
+from log_utils import get_logger
+from rate_limiter import RateLimiter
+from engine import ScrapeEngine
+from autotune import load_profile
+
+logger = get_logger(__name__)
 
 class PorkbunScraper:
-    def __init__(self, max_workers=5, search_query=None, max_pages=None, **search_params):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(self, max_workers=None, search_query=None, max_pages=None, fast_parse=None,
+                 session=None, rate_limiter=None, executor=None, schema_drift=None, base_url=None,
+                 stream=None, page_cache=None, where=None, fields=None, stop_at=None, **search_params):
+        # A session and rate limiter can be shared by several scrapers
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+        self.session = session
+        self.base_url = base_url or BASE_URL
+        
+        # Settings recommended by autotune.py for this server override the config defaults;
+        # without one, a serial scraper keeps the unhurried pace of a single browser
+        profile = load_profile(self.base_url)
+        self.executor = executor or EXECUTOR  # serial, thread, async or process
+        default_rate = SERIAL_REQUESTS_PER_SECOND if self.executor == 'serial' else REQUESTS_PER_SECOND
+        self.rate_limiter = rate_limiter or RateLimiter(profile.get('requests_per_second', default_rate))
+        self.retry_delay = profile.get('retry_delay', RETRY_DELAY)
         self.total_domains_scraped = 0
         self.total_pages_scraped = 0
         self.error_count = 0
-        self.max_workers = max_workers
+        self.total_domains = None
+        self.fetch_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.bytes_compressed = 0  # Body bytes on the wire, for streamed responses
+        self.bytes_decompressed = 0
+        self.last_run_metrics = None
+        self.max_workers = max_workers or profile.get('max_workers') or 5
         self.lock = threading.Lock()  # For thread-safe counter updates
         
         # Set search parameters
@@ -40,96 +73,153 @@ class PorkbunScraper:
         # Set the search query if provided
         if self.search_query:
             self.search_params['q'] = self.search_query
+        
+        # Column mapping from the table header, resolved once and shared by both extractors
+        self.schema = SchemaResolver(schema_drift)
+        
+        # Client-side predicates and column projection, applied while rows are extracted,
+        # and the bound on the sort key past which no more pages are needed
+        self.sort_bound = SortBound.from_settings(self.search_params, stop_at)
+        self.row_filter = RowFilter.from_settings(where, fields, self.sort_bound)
+        self.rows_scanned = 0
+        
+        # Optional regex extractor, verified against BeautifulSoup on sampled pages
+        self.fast_extractor = FastExtractor(self.schema, self.row_filter)
+        self.differential_checker = None
+        if FAST_PARSER if fast_parse is None else fast_parse:
+            self.differential_checker = DifferentialChecker(PARSER_VERIFY_SAMPLE_RATE)
+        
+        # Streamed responses are parsed incrementally while they download
+        self.stream = STREAM_RESPONSES if stream is None else stream
+        
+        # Records of pages whose table is unchanged since the last run are reused
+        # (not with a row filter: cached records would be those of another filter)
+        use_page_cache = PAGE_CACHE if page_cache is None else page_cache
+        if use_page_cache and self.row_filter is not None:
+            logger.info("Page cache disabled while a row filter is active")
+            use_page_cache = False
+        self.page_cache = PageCache() if use_page_cache else None
+        self.reused_offsets = set()
+        
+        # Rows requested per page; the engine raises it when the server verifiably honours it
+        self.page_size = DOMAINS_PER_PAGE
+        
         # Initialize progress and state management
-        self.progress_bar = None
+        self.progress = None
         self.state_manager = StateManager(STATE_FILE)
         self.auto_flush_writer = None
         
-    def _make_request(self, url, retry_count=0):
+    def _make_request(self, url, retry_count=0, stream=False, offset=None):
         """Make HTTP request with retry logic"""
+        start_time = None
         try:
-            response = self.session.get(url, timeout=30)
+            self.rate_limiter.acquire()
+            start_time = time.perf_counter()
+            response = self.session.get(url, timeout=30, stream=stream)
             response.raise_for_status()
+            logger.debug("GET %s -> %s", url, response.status_code, extra={
+                'offset': offset, 'url': url, 'status': response.status_code, 'attempt': retry_count + 1,
+                'latency_ms': round((time.perf_counter() - start_time) * 1000, 1)})
             return response
             
         except requests.exceptions.RequestException as e:
+            fields = {
+                'offset': offset, 'url': url, 'attempt': retry_count + 1, 'error': str(e),
+                'status': e.response.status_code if e.response is not None else None,
+                'latency_ms': round((time.perf_counter() - start_time) * 1000, 1) if start_time else None,
+            }
             if retry_count < MAX_RETRIES:
-                print(f"Request failed (attempt {retry_count + 1}/{MAX_RETRIES}): {e}")
-                print(f"Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
-                return self._make_request(url, retry_count + 1)
+                logger.warning("Request failed (attempt %d/%d): %s\nRetrying in %s seconds...",
+                               retry_count + 1, MAX_RETRIES, e, self.retry_delay, extra=fields)
+                time.sleep(self.retry_delay)
+                return self._make_request(url, retry_count + 1, stream, offset)
             else:
-                print(f"Request failed after {MAX_RETRIES} attempts: {e}")
-                self.error_count += 1
+                logger.error("Request failed after %d attempts: %s", MAX_RETRIES, e, extra=fields)
+                with self.lock:
+                    self.error_count += 1
                 return None
                 
-    def _extract_domain_data_from_row(self, row):
-        """Extract domain data from a table row"""
+    def _extract_domain_data_from_row(self, row, mapping=None):
+        """Extract domain data from a table row using the header-derived column mapping
+
+        Returns None for rows that are skipped and PAST_BOUND for rows past the sort bound.
+        """
         try:
+            mapping = mapping or self.schema.current or self.schema.resolve(None)
             cells = row.find_all('td')
-            if len(cells) < 10:  # We expect at least 10 columns
+            if len(cells) < mapping.min_cells:
                 return None
                 
-            # Extract data from each cell in correct order
-            # Based on the table structure: Domain, TLD, Time Left, Starting Price, Current Bid, Bids, Domain Age, Revenue, Visitors
-            domain_cell = cells[0].find('a')
-            domain = domain_cell.text.strip() if domain_cell else cells[0].text.strip()
+            # The domain cell links to the auction page
+            domain_cell = cells[mapping.indexes[0]].find('a')
             
-            # Extract TLD from the TLD column (2nd column)
-            tld = cells[1].text.strip()
-            
-            time_left = cells[2].text.strip()  # Time Left is 3rd column
-            starting_price = cells[3].text.strip()  # Starting Price is 4th column
-            current_bid = cells[4].text.strip()  # Current Bid is 5th column
-            bids_count = cells[5].text.strip()  # Bids is 6th column
-            domain_age = cells[6].text.strip()  # Domain Age is 7th column
-            revenue = cells[7].text.strip()  # Revenue is 8th column
-            visitors = cells[8].text.strip()  # Visitors is 9th column
+            if self.row_filter is None:
+                # Cells in CSV_HEADERS order; fields without a column are left blank
+                values = [cells[index].text.strip() if index is not None else '' for index in mapping.indexes]
+                if domain_cell:
+                    values[0] = domain_cell.text.strip()
+            else:
+                # Only the tested cells are read until the row is known to match
+                def cell_text(position):
+                    if position == 0 and domain_cell:
+                        return domain_cell.text.strip()
+                    index = mapping.indexes[position]
+                    return cells[index].text.strip() if index is not None else ''
+                values = self.row_filter.select(cell_text)
+                if values is None or values is PAST_BOUND:
+                    return values
+            auction_url = domain_cell.get('href', '') if domain_cell else ''
             
-            # Clean up the data
-            return {
-                'domain': domain,
-                'tld': tld,
-                'time_left': time_left,
-                'starting_price': starting_price,
-                'current_bid': current_bid,
-                'bids_count': bids_count,
-                'domain_age': domain_age,
-                'revenue': revenue,
-                'visitors': visitors
-            }
+            return DomainRecord(*values, auction_url=auction_url)
             
         except Exception as e:
-            print(f"Error extracting data from row: {e}")
+            logger.warning("Error extracting data from row: %s", e, extra={'error': str(e)})
             return None
             
+    def _table_headers(self, table):
+        """Text of the table's header cells, or None when it has no header row"""
+        for row in table.find_all('tr'):
+            if row.find('th'):
+                return [cell.text for cell in row.find_all(['th', 'td'])]
+        return None
+            
     def _extract_domains_from_page(self, soup):
         """Extract all domain data from a page"""
         domains = []
+        scanned = 0
+        reached_bound = False
         
         try:
             # Find the main table containing domain data
             table = soup.find('table')
             if not table:
-                print("No table found on the page")
+                logger.warning("No table found on the page")
                 return domains
                 
+            # Map columns by header name (cached after the first page)
+            mapping = self.schema.resolve(self._table_headers(table))
+            
             # Find all rows in the table body
             rows = table.find_all('tr')
             
             for row in rows:
                 # Skip header row and rows without enough cells
-                if row.find('th') or len(row.find_all('td')) < 9:
+                if row.find('th') or len(row.find_all('td')) < mapping.min_cells:
                     continue
                     
-                domain_data = self._extract_domain_data_from_row(row)
-                if domain_data:
+                scanned += 1
+                domain_data = self._extract_domain_data_from_row(row, mapping)
+                if domain_data is PAST_BOUND:
+                    reached_bound = True
+                elif domain_data:
                     domains.append(domain_data)
                     
+        except SchemaDriftError:
+            raise
         except Exception as e:
-            print(f"Error extracting domains from page: {e}")
+            logger.error("Error extracting domains from page: %s", e, extra={'error': str(e)})
             
-        return domains
+        return domains if self.row_filter is None else FilteredRows(domains, scanned, reached_bound)
         
     def _get_total_domains_count(self, soup):
         """Extract the total number of domains from the page"""
@@ -141,15 +231,9 @@ class PorkbunScraper:
                 if match:
                     return int(match.group(1))
         except Exception as e:
-            print(f"Error extracting total domains count: {e}")
+            logger.warning("Error extracting total domains count: %s", e, extra={'error': str(e)})
         return None
         
-    def _rate_limit_delay(self):
-        """Implement rate limiting with random delay"""
-        delay = random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
-        time.sleep(delay)
-        return delay
-        
     def _build_url(self, offset=0):
         """Build URL with search parameters and pagination"""
         params = {}
@@ -159,137 +243,348 @@ class PorkbunScraper:
             if value:  # Only include non-empty parameters
                 params[key] = value
         
-        # Add pagination offset
+        # Add pagination offset and any negotiated page size
         if offset > 0:
             params['from'] = offset
+        if self.page_size != DOMAINS_PER_PAGE:
+            params[PAGE_SIZE_PARAM] = self.page_size
             
         # Build URL with parameters
         if params:
             query_string = urlencode(params)
-            return f"{BASE_URL}?{query_string}"
+            return f"{self.base_url}?{query_string}"
         else:
-            return BASE_URL
+            return self.base_url
     
-    def scrape_page(self, offset=0):
-        """Scrape a single page of auction results"""
+    def _parse_page(self, response, url, parse_total=False):
+        """Extract domains and optionally the total count from a response
+
+        With the fast parser enabled, the raw bytes are parsed with regexes and
+        a sample of pages is cross-checked against BeautifulSoup.
+        """
+        checker = self.differential_checker
+        if checker is not None and checker.fast_enabled:
+            domains = self.fast_extractor.extract_domains(response.content)
+            total_domains = self.fast_extractor.get_total_domains_count(response.content) if parse_total else None
+            if not checker.should_verify():
+                return domains, total_domains
+            soup = BeautifulSoup(response.text, 'html.parser')
+            reference = self._extract_domains_from_page(soup)
+            if checker.compare(url, domains, reference):
+                return domains, total_domains
+        else:
+            soup = BeautifulSoup(response.text, 'html.parser')
+            reference = self._extract_domains_from_page(soup)
+        
+        total_domains = self._get_total_domains_count(soup) if parse_total else None
+        return reference, total_domains
+        
+    def _parse_streamed(self, response, url, parse_total=False):
+        """Parse a streamed response chunk by chunk as it downloads
+
+        Returns (domains, total_domains, fetch_seconds, parse_seconds), with
+        the time spent waiting for chunks counted as fetch time. Pages picked
+        for parser verification keep their body for the BeautifulSoup check.
+        """
+        checker = self.differential_checker
+        verify = checker is not None and checker.should_verify()
+        extractor = StreamingExtractor(self.schema, parse_total, self.row_filter)
+        domains = []
+        body = []
+        fetch_seconds = parse_seconds = 0.0
+        try:
+            chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            while True:
+                start_time = time.perf_counter()
+                chunk = next(chunks, None)
+                fetch_seconds += time.perf_counter() - start_time
+                if chunk is None:
+                    break
+                start_time = time.perf_counter()
+                domains.extend(extractor.feed(chunk))
+                parse_seconds += time.perf_counter() - start_time
+                if verify:
+                    body.append(chunk)
+            domains.extend(extractor.finish())
+            if self.row_filter is not None:
+                domains = FilteredRows(domains, extractor.rows_scanned, extractor.past_bound)
+        finally:
+            raw = getattr(response, 'raw', None)
+            compressed = raw.tell() if hasattr(raw, 'tell') else extractor.bytes_fed
+            response.close()
+        with self.lock:
+            self.bytes_compressed += compressed
+            self.bytes_decompressed += extractor.bytes_fed
+
+        total_domains = extractor.total_domains
+        if verify:
+            start_time = time.perf_counter()
+            soup = BeautifulSoup(b''.join(body).decode(response.encoding or 'utf-8', 'replace'), 'html.parser')
+            reference = self._extract_domains_from_page(soup)
+            if not checker.compare(url, domains, reference):
+                domains = reference
+                total_domains = self._get_total_domains_count(soup) if parse_total else None
+            parse_seconds += time.perf_counter() - start_time
+        return domains, total_domains, fetch_seconds, parse_seconds
+        
+    def _reuse_cached_page(self, offset, url, response):
+        """Look a page up in the page cache by its table fingerprint
+
+        Returns (cached, fingerprint) where cached is (domains, total_domains)
+        when the page is unchanged since it was stored, else None.
+        """
+        if self.page_cache is None:
+            return None, None
+        fingerprint = table_fingerprint(response.content, self.schema)
+        if fingerprint is None:
+            return None, None
+        domains = self.page_cache.lookup(url, fingerprint, self._response_time(response))
+        if domains is None:
+            return None, fingerprint
+        with self.lock:
+            self.reused_offsets.add(offset)
+        total_domains = self.fast_extractor.get_total_domains_count(response.content) if offset == 0 else None
+        return (domains, total_domains), fingerprint
+        
+    def _cache_page(self, url, fingerprint, domains):
+        """Store a freshly parsed page in the page cache"""
+        if self.page_cache is not None and fingerprint is not None:
+            self.page_cache.store(url, fingerprint, domains)
+        
+    def _response_time(self, response):
+        """When a response was produced: the server Date header, or now when it is missing"""
+        date = response.headers.get('Date') if getattr(response, 'headers', None) else None
+        if date:
+            try:
+                return parsedate_to_datetime(date).astimezone(timezone.utc)
+            except (TypeError, ValueError):
+                pass
+        return datetime.now(timezone.utc).replace(microsecond=0)
+        
+    def _stamp_end_times(self, domains, fetched_at):
+        """Set each record's absolute end_time from its time_left and the page's response time"""
+        for domain in domains:
+            seconds = parse_time_left(domain.time_left)
+            if seconds is not None:
+                domain.end_time = (fetched_at + timedelta(seconds=seconds)).isoformat()
+        
+    def fetch_page(self, offset=0, stream=False):
+        """Fetch a single page; returns (url, response), with None for a failed request
+
+        With stream=True only the headers have been read when this returns.
+        """
         url = self._build_url(offset)
+        start_time = time.perf_counter()
+        response = self._make_request(url, stream=stream, offset=offset)
+        with self.lock:
+            self.fetch_seconds += time.perf_counter() - start_time
+        return url, response
         
-        print(f"Scraping page: {url}")
+    def _record_page(self, domains, offset=None, replaces=None):
+        """Update counters and progress for a parsed page
+
+        replaces is an already counted earlier result for the same page,
+        whose rows are swapped for these instead of counting another page.
+        """
+        logger.debug("Page %s: %d rows", offset, len(domains), extra={'offset': offset, 'rows': len(domains)})
+        pages = 1 if replaces is None else 0
+        added = len(domains) - (len(replaces) if replaces is not None else 0)
+        with self.lock:
+            self.total_pages_scraped += pages
+            self.total_domains_scraped += added
+            self.rows_scanned += rows_scanned(domains) - rows_scanned(replaces)
+            
+        # Per-thread progress counters; rendering happens on the ticker thread
+        if self.progress is not None:
+            self.progress.add(pages=pages, domains=added)
+            
+    def _record_failure(self, count_error=False):
+        """Update counters and progress for a failed page"""
+        if count_error:
+            with self.lock:
+                self.error_count += 1
+        if self.progress is not None:
+            self.progress.add(errors=1)
+            
+    def scrape_page(self, offset=0, record=True):
+        """Scrape a single page of auction results
+
+        With record=False the page is fetched and parsed without being
+        added to the counters, e.g. for probes that may be discarded.
+        """
+        # Streaming needs the regex extractor, so it stops if verification disabled it
+        checker = self.differential_checker
+        stream = self.stream and (checker is None or checker.fast_enabled)
         
         # Make the request
-        response = self._make_request(url)
+        url, response = self.fetch_page(offset, stream=stream)
         if not response:
+            self._record_failure()
             return None, 0
             
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract domain data
-        domains = self._extract_domains_from_page(soup)
-        
-        # Get total domains count (only on first page)
-        total_domains = None
-        if offset == 0:
-            total_domains = self._get_total_domains_count(soup)
-            if total_domains:
-                print(f"Total domains found: {total_domains}")
+        # Parse the page and extract domain data, with the total count only on the first page
+        if stream:
+            try:
+                domains, total_domains, fetch_seconds, parse_seconds = self._parse_streamed(
+                    response, url, parse_total=(offset == 0))
+            except requests.exceptions.RequestException as e:
+                logger.error("Error reading streamed response for %s: %s", url, e,
+                             extra={'offset': offset, 'url': url, 'error': str(e)})
+                self._record_failure(count_error=True)
+                return None, 0
+            with self.lock:
+                self.fetch_seconds += fetch_seconds
+                self.parse_seconds += parse_seconds
+            self._stamp_end_times(domains, self._response_time(response))
+        else:
+            start_time = time.perf_counter()
+            cached, fingerprint = self._reuse_cached_page(offset, url, response)
+            if cached is not None:
+                domains, total_domains = cached
+            else:
+                domains, total_domains = self._parse_page(response, url, parse_total=(offset == 0))
+                self._stamp_end_times(domains, self._response_time(response))
+                self._cache_page(url, fingerprint, domains)
+            with self.lock:
+                self.parse_seconds += time.perf_counter() - start_time
+        if total_domains:
+            logger.info("Total domains found: %d", total_domains)
                 
         # Update counters
-        self.total_pages_scraped += 1
-        self.total_domains_scraped += len(domains)
+        if record:
+            self._record_page(domains, offset)
         
         return domains, total_domains
         
-    def scrape_all_pages(self, max_pages=None):
-        """Scrape all auction pages"""
-        # Determine the maximum number of pages to scrape
+    def _resolve_max_pages(self, max_pages=None):
+        """Determine the maximum number of pages to scrape"""
         if max_pages is not None:
-            max_pages = min(max_pages, MAX_PAGES_TO_PROCESS)
-        elif self.max_pages_limit is not None:
-            max_pages = min(self.max_pages_limit, MAX_PAGES_TO_PROCESS)
-        else:
-            max_pages = MAX_PAGES_TO_PROCESS
-            
-        all_domains = []
-        total_domains = None
-        current_offset = 0
-        page_count = 0
-        
-        # Show search parameters if any
-        if any(self.search_params.values()):
-            active_params = {k: v for k, v in self.search_params.items() if v}
-            print(f"Search parameters: {active_params}")
+            return min(max_pages, MAX_PAGES_TO_PROCESS)
+        if self.max_pages_limit is not None:
+            return min(self.max_pages_limit, MAX_PAGES_TO_PROCESS)
+        return MAX_PAGES_TO_PROCESS
         
-        print("Starting to scrape Porkbun auction pages...")
+    def iter_pages(self, max_pages=None, on_page=None, on_error=None):
+        """Yield (offset, domains) for each page in order, without writing any output
+
+        on_page(offset, domains) is called for every page before it is yielded.
+        on_error(offset, exception) is called for pages that fail; the crawl
+        skips them while the total is known and stops otherwise.
+        """
+        max_pages = self._resolve_max_pages(max_pages)
+        self.total_domains = None
+        offset = 0
         
-        while page_count < max_pages:
-            # Scrape current page
-            domains, total_count = self.scrape_page(current_offset)
-            
-            if domains is None:
-                print("Failed to scrape page. Stopping.")
-                break
+        for page_index in range(max_pages):
+            try:
+                domains, total_count = self.scrape_page(offset)
+                if domains is None:
+                    raise RuntimeError(f"Request failed: {self._build_url(offset)}")
+            except Exception as e:
+                if on_error is not None:
+                    on_error(offset, e)
+                if self.total_domains is None:
+                    return
+            else:
+                if total_count:
+                    self.total_domains = total_count
+                if not rows_scanned(domains):
+                    return
+                if on_page is not None:
+                    on_page(offset, domains)
+                yield offset, domains
+                if past_bound(domains):
+                    return
                 
-            if not domains:
-                print("No more domains found. Stopping.")
-                break
+            offset += DOMAINS_PER_PAGE
+            if self.total_domains is not None and offset >= self.total_domains:
+                return
                 
-            all_domains.extend(domains)
-            page_count += 1
-            
-            # Set total domains count from first page
-            if total_count is not None:
-                total_domains = total_count
-                estimated_pages = (total_domains + DOMAINS_PER_PAGE - 1) // DOMAINS_PER_PAGE
-                print(f"Estimated total pages to scrape: {estimated_pages}")
-                
-                # Initialize progress bar after we know the total
-                if self.progress_bar is None and total_domains:
-                    self.progress_bar = ProgressBar(total=total_domains, width=PROGRESS_BAR_WIDTH, update_interval=PROGRESS_UPDATE_INTERVAL)
-                    self.progress_bar.start()
-            
-            # Progress update (only if progress bar is initialized)
-            if self.progress_bar is not None:
-                self.progress_bar.update(self.total_domains_scraped, total=total_domains)
-            
-            print(f"Page {page_count} completed: {len(domains)} domains scraped")
-            
-            # Check if we've scraped all domains
-            if total_domains and self.total_domains_scraped >= total_domains:
-                print("All domains have been scraped.")
-                break
+    def iter_domains(self, max_pages=None, on_page=None, on_record=None, on_error=None):
+        """Yield each domain record as soon as its page has been parsed"""
+        for _, domains in self.iter_pages(max_pages, on_page, on_error):
+            for record in domains:
+                if on_record is not None:
+                    on_record(record)
+                yield record
                 
-            # Move to next page
-            current_offset += DOMAINS_PER_PAGE
+    def scrape(self, max_pages=None, on_page=None, on_record=None, on_error=None):
+        """Run a crawl driven only by callbacks and return its statistics"""
+        start_time = time.monotonic()
+        for _ in self.iter_domains(max_pages, on_page, on_record, on_error):
+            pass
+        stats = self.get_scraping_stats()
+        stats['total_domains'] = self.total_domains
+        stats['elapsed_seconds'] = round(time.monotonic() - start_time, 3)
+        return stats
+        
+    async def aiter_pages(self, max_pages=None, on_page=None, on_error=None):
+        """Async counterpart of iter_pages
+
+        Requests and parsing run in the default executor so the event loop
+        is never blocked; on_page runs on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        pages = self.iter_pages(max_pages, on_error=on_error)
+        done = object()
+        while True:
+            item = await loop.run_in_executor(None, next, pages, done)
+            if item is done:
+                return
+            if on_page is not None:
+                on_page(*item)
+            yield item
             
-            # Rate limiting
-            if page_count < max_pages:  # Don't delay after the last page
-                delay = self._rate_limit_delay()
-                print(f"Waiting {delay:.2f} seconds before next request...")
+    async def aiter_domains(self, max_pages=None, on_page=None, on_record=None, on_error=None):
+        """Async counterpart of iter_domains"""
+        async for _, domains in self.aiter_pages(max_pages, on_page, on_error):
+            for record in domains:
+                if on_record is not None:
+                    on_record(record)
+                yield record
                 
-        print(f"\nScraping completed!")
-        print(f"Total pages scraped: {page_count}")
-        print(f"Total domains scraped: {self.total_domains_scraped}")
-        print(f"Total errors encountered: {self.error_count}")
-        
-        # Save state for resumption
-        self.state_manager.save_state(
-            last_offset=current_offset,
-            total_pages_scraped=page_count,
-            total_domains_scraped=self.total_domains_scraped,
-            search_params=self.search_params
-        )
+    async def ascrape(self, max_pages=None, on_page=None, on_record=None, on_error=None):
+        """Async counterpart of scrape"""
+        start_time = time.monotonic()
+        async for _ in self.aiter_domains(max_pages, on_page, on_record, on_error):
+            pass
+        stats = self.get_scraping_stats()
+        stats['total_domains'] = self.total_domains
+        stats['elapsed_seconds'] = round(time.monotonic() - start_time, 3)
+        return stats
         
-        # Complete progress bar
-        if self.progress_bar is not None:
-            self.progress_bar.finish()
-        
-        return all_domains, total_domains
+    def scrape_all_pages(self, max_pages=None, max_workers=None, csv_writer=None, executor=None, on_page=None):
+        """Scrape all auction pages on the selected executor
+
+        When csv_writer is given, each page is handed to it as soon as it
+        completes instead of being left for the caller to write at the end.
+        on_page(offset, domains) is called for each completed page.
+        """
+        engine = ScrapeEngine(self, executor or self.executor, max_workers or self.max_workers)
+        return engine.run(max_pages, csv_writer, on_page)
         
     def get_scraping_stats(self):
         """Get current scraping statistics"""
-        return {
+        stats = {
             'total_domains_scraped': self.total_domains_scraped,
             'total_pages_scraped': self.total_pages_scraped,
-            'error_count': self.error_count
-        }
\ No newline at end of file
+            'error_count': self.error_count,
+            'fetch_seconds': round(self.fetch_seconds, 3),
+            'parse_seconds': round(self.parse_seconds, 3)
+        }
+        if self.page_cache is not None:
+            stats['page_cache'] = self.page_cache.get_stats()
+        if self.stream:
+            stats['bytes_compressed'] = self.bytes_compressed
+            stats['bytes_decompressed'] = self.bytes_decompressed
+        if self.differential_checker is not None:
+            stats['parser_verification'] = self.differential_checker.get_stats()
+        if self.schema.current is not None:
+            stats['schema'] = self.schema.current.to_dict()
+        if self.row_filter is not None:
+            stats['row_filter'] = {
+                'filter': self.row_filter.describe(),
+                'rows_scanned': self.rows_scanned,
+                'rows_matched': self.total_domains_scraped,
+            }
+        return stats
\ No newline at end of file
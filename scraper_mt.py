@@ -1,279 +1,21 @@
-import requests
-import time
-import random
-import re
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from config import (
-    BASE_URL, HEADERS, REQUEST_DELAY_MIN, REQUEST_DELAY_MAX,
-    MAX_RETRIES, RETRY_DELAY, DOMAINS_PER_PAGE, MAX_PAGES_TO_PROCESS,
-    SEARCH_PARAMS, SEARCH_QUERY, MAX_PAGES_LIMIT
-)
-from urllib.parse import urlencode
+from scraper import PorkbunScraper as _PorkbunScraper
+
+
+class PorkbunScraper(_PorkbunScraper):
+    """Multithreaded scraper
+
+    Kept for backward compatibility: it is the shared scraper with the
+    thread pool executor selected by default.
+    """
+
+    def __init__(self, max_workers=None, search_query=None, max_pages=None, executor='thread', **kwargs):
+        super().__init__(max_workers=max_workers, search_query=search_query, max_pages=max_pages,
+                         executor=executor, **kwargs)
 
-class PorkbunScraper:
-    def __init__(self, max_workers=5, search_query=None, max_pages=None, **search_params):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-        self.total_domains_scraped = 0
-        self.total_pages_scraped = 0
-        self.error_count = 0
-        self.max_workers = max_workers
-        self.lock = threading.Lock()  # For thread-safe counter updates
-        
-        # Set search parameters
-        self.search_query = search_query or SEARCH_QUERY
-        self.max_pages_limit = max_pages or MAX_PAGES_LIMIT
-        
-        # Initialize search parameters with defaults
-        self.search_params = SEARCH_PARAMS.copy()
-        
-        # Override with provided parameters
-        for key, value in search_params.items():
-            if key in self.search_params and value is not None:
-                self.search_params[key] = value
-        
-        # Set the search query if provided
-        if self.search_query:
-            self.search_params['q'] = self.search_query
-        
-    def _make_request(self, url, retry_count=0):
-        """Make HTTP request with retry logic"""
-        try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return response
-            
-        except requests.exceptions.RequestException as e:
-            if retry_count < MAX_RETRIES:
-                print(f"Request failed (attempt {retry_count + 1}/{MAX_RETRIES}): {e}")
-                print(f"Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
-                return self._make_request(url, retry_count + 1)
-            else:
-                print(f"Request failed after {MAX_RETRIES} attempts: {e}")
-                self.error_count += 1
-                return None
-                
-    def _extract_domain_data_from_row(self, row):
-        """Extract domain data from a table row"""
-        try:
-            cells = row.find_all('td')
-            if len(cells) < 10:  # We expect at least 10 columns
-                return None
-                
-            # Extract data from each cell in correct order
-            # Based on the table structure: Domain, TLD, Time Left, Starting Price, Current Bid, Bids, Domain Age, Revenue, Visitors
-            domain_cell = cells[0].find('a')
-            domain = domain_cell.text.strip() if domain_cell else cells[0].text.strip()
-            
-            # Extract TLD from TLD column (2nd column)
-            tld = cells[1].text.strip()
-            
-            time_left = cells[2].text.strip()  # Time Left is 3rd column
-            starting_price = cells[3].text.strip()  # Starting Price is 4th column
-            current_bid = cells[4].text.strip()  # Current Bid is 5th column
-            bids_count = cells[5].text.strip()  # Bids is 6th column
-            domain_age = cells[6].text.strip()  # Domain Age is 7th column
-            revenue = cells[7].text.strip()  # Revenue is 8th column
-            visitors = cells[8].text.strip()  # Visitors is 9th column
-            
-            # Clean up the data
-            return {
-                'domain': domain,
-                'tld': tld,
-                'time_left': time_left,
-                'starting_price': starting_price,
-                'current_bid': current_bid,
-                'bids_count': bids_count,
-                'domain_age': domain_age,
-                'revenue': revenue,
-                'visitors': visitors
-            }
-            
-        except Exception as e:
-            print(f"Error extracting data from row: {e}")
-            return None
-            
-    def _extract_domains_from_page(self, soup):
-        """Extract all domain data from a page"""
-        domains = []
-        
-        try:
-            # Find the main table containing domain data
-            table = soup.find('table')
-            if not table:
-                print("No table found on the page")
-                return domains
-                
-            # Find all rows in the table body
-            rows = table.find_all('tr')
-            
-            for row in rows:
-                # Skip header row and rows without enough cells
-                if row.find('th') or len(row.find_all('td')) < 10:
-                    continue
-                    
-                domain_data = self._extract_domain_data_from_row(row)
-                if domain_data:
-                    domains.append(domain_data)
-                    
-        except Exception as e:
-            print(f"Error extracting domains from page: {e}")
-            
-        return domains
-        
-    def _get_total_domains_count(self, soup):
-        """Extract the total number of domains from the page"""
-        try:
-            # Look for text like "Showing 1 - 100 out of 286308 results"
-            text_elements = soup.find_all(text=re.compile(r'Showing.*out of.*results'))
-            for text in text_elements:
-                match = re.search(r'out of (\d+)', text)
-                if match:
-                    return int(match.group(1))
-        except Exception as e:
-            print(f"Error extracting total domains count: {e}")
-            return None
-        
-    def _rate_limit_delay(self):
-        """Implement rate limiting with random delay"""
-        delay = random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
-        time.sleep(delay)
-        return delay
-        
-    def _build_url(self, offset=0):
-        """Build URL with search parameters and pagination"""
-        params = {}
-        
-        # Add search parameters (only non-empty values)
-        for key, value in self.search_params.items():
-            if value:  # Only include non-empty parameters
-                params[key] = value
-        
-        # Add pagination offset
-        if offset > 0:
-            params['from'] = offset
-            
-        # Build URL with parameters
-        if params:
-            query_string = urlencode(params)
-            return f"{BASE_URL}?{query_string}"
-        else:
-            return BASE_URL
-    
     def _scrape_page_with_threading(self, offset):
         """Scrape a single page with threading support"""
         return self.scrape_page(offset)
-        
-    def scrape_page(self, offset=0):
-        """Scrape a single page of auction results"""
-        url = self._build_url(offset)
-        
-        print(f"Scraping page: {url}")
-        
-        # Make the request
-        response = self._make_request(url)
-        if not response:
-            return None, 0
-            
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract domain data
-        domains = self._extract_domains_from_page(soup)
-        
-        # Get total domains count (only on first page)
-        total_domains = None
-        if offset == 0:
-            total_domains = self._get_total_domains_count(soup)
-            if total_domains:
-                print(f"Total domains found: {total_domains}")
-                
-        # Update counters with thread safety
-        with self.lock:
-            self.total_pages_scraped += 1
-            self.total_domains_scraped += len(domains)
-        
-        return domains, total_domains
-        
-    def scrape_all_pages(self, max_pages=None, max_workers=5):
+
+    def scrape_all_pages(self, max_pages=None, max_workers=None, csv_writer=None, executor=None, on_page=None):
         """Scrape all auction pages with multithreading"""
-        all_domains = []
-        total_domains = None
-        page_count = 0
-        
-        # Determine maximum number of pages to scrape
-        if max_pages is not None:
-            max_pages = min(max_pages, MAX_PAGES_TO_PROCESS)
-        elif self.max_pages_limit is not None:
-            max_pages = min(self.max_pages_limit, MAX_PAGES_TO_PROCESS)
-        else:
-            # First, get the total count to determine pages needed
-            print("Getting total domain count...")
-            _, total_count = self.scrape_page(0)
-            if total_count is not None:
-                total_domains = total_count
-                max_pages = min((total_count + DOMAINS_PER_PAGE - 1) // DOMAINS_PER_PAGE, MAX_PAGES_TO_PROCESS)
-                print(f"Total domains to scrape: {total_domains}")
-                print(f"Estimated pages to scrape: {max_pages}")
-            else:
-                max_pages = MAX_PAGES_TO_PROCESS
-        
-        # Show search parameters if any
-        if any(self.search_params.values()):
-            active_params = {k: v for k, v in self.search_params.items() if v}
-            print(f"Search parameters: {active_params}")
-        
-        print(f"Starting to scrape Porkbun auction pages with {max_workers} workers...")
-        
-        # Use ThreadPoolExecutor for parallel scraping
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all page scraping tasks
-            future_to_offset = {}
-            offsets = list(range(0, max_pages * DOMAINS_PER_PAGE, DOMAINS_PER_PAGE))
-            
-            print(f"Submitting {len(offsets)} pages for parallel scraping...")
-            
-            for i, offset in enumerate(offsets):
-                future = executor.submit(self._scrape_page_with_threading, offset)
-                future_to_offset[future] = offset
-                
-            # Collect results as they complete
-            completed_count = 0
-            for future in as_completed(future_to_offset.keys()):
-                try:
-                    domains, _ = future.result()
-                    if domains:
-                        # Add page offset to each domain for sorting
-                        for domain in domains:
-                            domain['_page_offset'] = offset
-                        all_domains.extend(domains)
-                        if total_domains is None and _ is not None:
-                            total_domains = _
-                        print(f"Page {completed_count + 1} (offset {future_to_offset[future]}) completed: {len(domains)} domains")
-                        completed_count += 1
-                except Exception as e:
-                    print(f"Error scraping page {future_to_offset[future]}: {e}")
-                    with self.lock:
-                        self.error_count += 1
-                    
-            # Sort domains by original page order
-            all_domains.sort(key=lambda x: x.get('_page_offset', 0))
-            
-        print(f"\nParallel scraping completed!")
-        print(f"Total pages processed: {completed_count}")
-        print(f"Total domains scraped: {len(all_domains)}")
-        print(f"Total errors encountered: {self.error_count}")
-        
-        return all_domains, total_domains
-        
-    def get_scraping_stats(self):
-        """Get current scraping statistics"""
-        return {
-            'total_domains_scraped': self.total_domains_scraped,
-            'total_pages_scraped': self.total_pages_scraped,
-            'error_count': self.error_count
-        }
\ No newline at end of file
+        return super().scrape_all_pages(max_pages, max_workers, csv_writer, executor, on_page)
@@ -0,0 +1,351 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from csv_writer import CSVWriter, open_output, detect_compression
+from records import DomainRecord
+from config import CSV_HEADERS, WRITER_QUEUE_SIZE, FSYNC_INTERVAL, SQLITE_TABLE
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class Sink:
+    """Output fed with record batches through its own bounded queue and thread
+
+    A producer only blocks on a sink whose queue is full, so a slow sink
+    applies backpressure on its own and the others keep writing.
+    Subclasses implement _open, _write_batch, _flush and _close.
+    """
+
+    name = 'sink'
+    _STOP = object()
+
+    def __init__(self, queue_size=None):
+        self.queue = queue.Queue(maxsize=queue_size or WRITER_QUEUE_SIZE)
+        self.thread = None
+        self.error = None
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_seconds = 0.0  # Time the sink thread spent writing
+        self.blocked_seconds = 0.0  # Time producers waited on a full queue
+        self.started_at = None
+        self.last_write_at = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        """Open the output and start the sink thread"""
+        self._open()
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name=f"{self.name}-sink", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """Drain pending batches, stop the sink thread and close the output"""
+        if self.thread is not None:
+            self.queue.put(self._STOP)
+            self.thread.join()
+            self.thread = None
+            self._close()
+        self._raise_error()
+
+    def _raise_error(self):
+        """Re-raise an exception from the sink thread in the caller"""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError(f"{self.name} sink failed: {error}") from error
+
+    def submit(self, batch):
+        """Queue a batch, blocking only while this sink's queue is full"""
+        if self.thread is None:
+            raise RuntimeError(f"{self.name} sink is not open. Call open() first.")
+        self._raise_error()
+        try:
+            self.queue.put_nowait(batch)
+        except queue.Full:
+            start = time.monotonic()
+            self.queue.put(batch)
+            self.blocked_seconds += time.monotonic() - start
+
+    def flush(self):
+        """Wait for queued batches to be written, then flush the output
+
+        The flush itself runs on the sink thread, which owns the output.
+        """
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+            self._raise_error()
+
+    def _run(self):
+        """Sink thread loop"""
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is self._STOP:
+                    return
+                if isinstance(batch, threading.Event):
+                    # Flush request; batches queued before it are already written
+                    if self.error is None:
+                        self._flush()
+                elif self.error is None:
+                    start = time.monotonic()
+                    self._write_batch(batch)
+                    self.last_write_at = time.monotonic()
+                    self.write_seconds += self.last_write_at - start
+                    self.rows_written += len(batch)
+                    self.batches_written += 1
+            except Exception as e:
+                logger.error("Error writing to %s sink: %s", self.name, e, extra={'error': str(e)})
+                self.error = e
+            finally:
+                if isinstance(batch, threading.Event):
+                    batch.set()
+                self.queue.task_done()
+
+    def get_stats(self):
+        """Get throughput statistics for this sink"""
+        # Wall-clock rate up to this sink's last write, so a fast sink isn't
+        # charged for the time spent waiting on slower ones at shutdown
+        elapsed = self.last_write_at - self.started_at if self.last_write_at else 0.0
+        return {
+            'rows_written': self.rows_written,
+            'batches_written': self.batches_written,
+            'write_seconds': round(self.write_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'rows_per_second': round(self.rows_written / elapsed, 1) if elapsed else 0.0,
+            'write_rows_per_second': round(self.rows_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+        }
+
+    def _open(self):
+        pass
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    def _flush(self):
+        pass
+
+    def _close(self):
+        pass
+
+
+class CSVSink(Sink):
+    """CSV output through CSVWriter"""
+
+    name = 'csv'
+
+    def __init__(self, filename=None, compression=None, queue_size=None, fsync_interval=None, fields=None):
+        super().__init__(queue_size)
+        self.csv_writer = CSVWriter(filename, compression, fields)
+        self.filename = self.csv_writer.filename
+        self.compression = self.csv_writer.compression  # From the argument, OUTPUT_COMPRESSION or the file name
+        self.fsync_interval = FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.last_sync = time.monotonic()
+
+    def _open(self):
+        self.csv_writer.open()
+
+    def _write_batch(self, batch):
+        self.csv_writer.writer.writerows([self.csv_writer._format_row(d) for d in batch])
+        if self.fsync_interval and time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.csv_writer.sync()
+            self.last_sync = time.monotonic()
+
+    def _flush(self):
+        self.csv_writer.flush()
+
+    def _close(self):
+        self.csv_writer.sync()
+        self.csv_writer.close()
+
+
+class BackgroundCSVWriter(CSVSink):
+    """CSV writer that writes record batches on a dedicated thread
+
+    A CSVSink with the CSVWriter write interface, so it can be passed as
+    csv_writer on its own. Batches are handed over through the sink's
+    bounded queue, so scraping threads only block when the disk falls
+    behind by more than queue_size batches.
+    """
+
+    def write_multiple_domains(self, domains_data):
+        """Queue a batch of domain records for writing"""
+        batch = list(domains_data)
+        if batch:
+            self.submit(batch)
+        return len(batch)
+
+    def write_domain_data(self, domain_data):
+        """Queue a single domain's data for writing"""
+        return self.write_multiple_domains([domain_data]) == 1
+
+    def write_domain(self, domain_data):
+        """Alias of write_domain_data used by AutoFlushWriter"""
+        return self.write_domain_data(domain_data)
+
+
+class JSONLSink(Sink):
+    """JSON lines output, one record per line, for queue consumers"""
+
+    name = 'jsonl'
+
+    def __init__(self, filename, compression=None, queue_size=None):
+        super().__init__(queue_size)
+        self.filename = filename
+        self.compression = compression or detect_compression(filename)
+        self.file = None
+
+    def _open(self):
+        self.file = open_output(self.filename, 'a', self.compression)
+        logger.info("JSONL file opened: %s", self.filename)
+
+    def _write_batch(self, batch):
+        self.file.write(''.join(json.dumps(self._to_json(d)) + '\n' for d in batch))
+
+    @staticmethod
+    def _to_json(domain):
+        """Dict written for a row, with enrichment details under 'details' when present"""
+        if not isinstance(domain, DomainRecord):
+            return domain
+        data = domain.to_dict()
+        if domain.details:
+            data['details'] = domain.details
+        return data
+
+    def _flush(self):
+        self.file.flush()
+
+    def _close(self):
+        self.file.close()
+        logger.info("JSONL file closed: %s", self.filename)
+
+
+class SQLiteSink(Sink):
+    """SQLite output keeping every crawl's rows as history
+
+    Each row is stamped with the time its batch was written. The
+    connection is only used from the sink thread.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, filename, table=None, queue_size=None):
+        super().__init__(queue_size)
+        self.filename = filename
+        self.table = table or SQLITE_TABLE
+        self.connection = None
+        columns = ', '.join(CSV_HEADERS + ['scraped_at'])
+        placeholders = ', '.join('?' * (len(CSV_HEADERS) + 1))
+        self.insert_sql = f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})"
+
+    def _open(self):
+        self.connection = sqlite3.connect(self.filename, check_same_thread=False)
+        columns = ', '.join(f"{header} TEXT" for header in CSV_HEADERS + ['scraped_at'])
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns})")
+        self.connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_domain ON {self.table} (domain, scraped_at)")
+        self.connection.commit()
+        logger.info("SQLite database opened: %s", self.filename)
+
+    def _write_batch(self, batch):
+        scraped_at = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        for d in batch:
+            row = d.to_row() if isinstance(d, DomainRecord) else [d.get(header, '') for header in CSV_HEADERS]
+            row.append(scraped_at)
+            rows.append(row)
+        with self.connection:
+            self.connection.executemany(self.insert_sql, rows)
+
+    def _close(self):
+        self.connection.close()
+        logger.info("SQLite database closed: %s", self.filename)
+
+
+class FanOutWriter:
+    """Hands each parsed batch once to several sinks
+
+    Has the CSVWriter write interface, so it can be passed as csv_writer
+    to scrape_all_pages(). Per-sink throughput is reported on close.
+    """
+
+    def __init__(self, sinks):
+        if not sinks:
+            raise ValueError("FanOutWriter needs at least one sink")
+        self.sinks = list(sinks)
+        self.filename = self.sinks[0].filename
+        self.compression = self.sinks[0].compression
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        """Open every sink"""
+        opened = []
+        try:
+            for sink in self.sinks:
+                sink.open()
+                opened.append(sink)
+        except Exception:
+            for sink in opened:
+                sink.close()
+            raise
+
+    def close(self):
+        """Close every sink, then report throughput; the first sink error is re-raised"""
+        first_error = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                first_error = first_error or e
+        self.print_report()
+        if first_error is not None:
+            raise first_error
+
+    def write_multiple_domains(self, domains_data):
+        """Queue a batch of domain records on every sink"""
+        batch = list(domains_data)
+        if batch:
+            for sink in self.sinks:
+                sink.submit(batch)
+        return len(batch)
+
+    def write_domain_data(self, domain_data):
+        """Queue a single domain's data on every sink"""
+        return self.write_multiple_domains([domain_data]) == 1
+
+    def write_domain(self, domain_data):
+        """Alias of write_domain_data used by AutoFlushWriter"""
+        return self.write_domain_data(domain_data)
+
+    def flush(self):
+        """Wait until every sink has written its queued batches"""
+        for sink in self.sinks:
+            sink.flush()
+
+    def get_stats(self):
+        """Throughput statistics per sink"""
+        return {sink.name: sink.get_stats() for sink in self.sinks}
+
+    def print_report(self):
+        """Log per-sink throughput"""
+        logger.info("Sink throughput:")
+        for name, stats in self.get_stats().items():
+            logger.info("  %s: %d rows, %s rows/s (%s rows/s while writing), producers blocked %ss",
+                        name, stats['rows_written'], stats['rows_per_second'],
+                        stats['write_rows_per_second'], stats['blocked_seconds'])
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Snapshot diff for large auction CSV outputs
+Externally sorts both snapshots by domain in bounded-memory chunks (sorting
+chunks on several cores), then merge-joins them and emits added, removed
+and changed rows with field-level deltas as JSON lines
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from csv_writer import open_input
+from config import DIFF_CHUNK_ROWS, DIFF_IGNORE_FIELDS
+
+KEY_FIELD = 'domain'
+
+
+def _run_key(row):
+    """Sort key of a run row: domain, then input row number"""
+    return row[0], int(row[1])
+
+
+def _sort_chunk(rows, path):
+    """Sort one chunk by domain and input order and write it as a run file"""
+    rows.sort(key=_run_key)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def _read_run(path):
+    """Iterate over the rows of a sorted run file"""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+
+class SnapshotSorter:
+    """External sort of a CSV snapshot by domain
+
+    Run files are named after name, not the input file, so the sorters of
+    two snapshots with the same file name can share a temp_dir.
+    """
+
+    def __init__(self, filename, temp_dir, chunk_rows=None, max_workers=None, name='snapshot'):
+        self.filename = filename
+        self.temp_dir = temp_dir
+        self.name = name
+        self.chunk_rows = chunk_rows or DIFF_CHUNK_ROWS
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.header = None
+        self.runs = []
+        self.rows = 0
+        self.duplicates = 0
+        self.mismatched = 0  # Rows whose cell count differs from the header
+
+    def _chunks(self, reader):
+        """Yield lists of at most chunk_rows rows, domain and row number moved to the front
+
+        Rows with a different cell count than the header (e.g. rows with
+        end_time appended to an older 9-column file) are counted and padded
+        or cut to the header's width; columns are added at the end, so the
+        leading cells still line up.
+        """
+        width = len(self.header)
+        key_index = self.header.index(KEY_FIELD)
+        chunk = []
+        for number, row in enumerate(reader):
+            if len(row) != width:
+                if not row:
+                    continue
+                self.mismatched += 1
+                row = (row + [''] * width)[:width]
+            chunk.append([row[key_index], str(number)] + row)
+            if len(chunk) >= self.chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def sort(self):
+        """Split the snapshot into sorted runs, sorting up to max_workers chunks at once"""
+        base = os.path.join(self.temp_dir, self.name)
+        with open_input(self.filename) as f, ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            reader = csv.reader(f)
+            self.header = next(reader)
+            if KEY_FIELD not in self.header:
+                raise ValueError(f"{self.filename} has no '{KEY_FIELD}' column")
+            pending = set()
+            for chunk in self._chunks(reader):
+                # Bound memory: never hold more chunks than there are workers
+                if len(pending) >= self.max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self.runs.extend(future.result() for future in done)
+                self.rows += len(chunk)
+                pending.add(executor.submit(_sort_chunk, chunk, f"{base}.run{len(self.runs) + len(pending)}"))
+            self.runs.extend(future.result() for future in pending)
+        if self.mismatched:
+            print(f"Warning: {self.mismatched} rows of {self.filename} have a different number of cells "
+                  f"than its header; they were padded or cut to {len(self.header)} columns", file=sys.stderr)
+        return self
+
+    def records(self):
+        """Merged sorted stream of (domain, {field: value})
+
+        Output files are appended to across runs, so a repeated domain keeps
+        its last row, matching DomainIndex.get.
+        """
+        previous = None
+        for row in heapq.merge(*(_read_run(path) for path in self.runs), key=_run_key):
+            if previous is not None:
+                if row[0] == previous[0]:
+                    self.duplicates += 1
+                else:
+                    yield previous[0], dict(zip(self.header, previous[2:]))
+            previous = row
+        if previous is not None:
+            yield previous[0], dict(zip(self.header, previous[2:]))
+
+
+def diff_snapshots(old_file, new_file, out, ignore_fields=None, chunk_rows=None, max_workers=None):
+    """Write the differences between two snapshots to out as JSON lines; returns counts"""
+    ignore = set(DIFF_IGNORE_FIELDS if ignore_fields is None else ignore_fields)
+    counts = {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 0}
+
+    with tempfile.TemporaryDirectory(prefix='snapshot_diff_') as temp_dir:
+        old = SnapshotSorter(old_file, temp_dir, chunk_rows, max_workers, name='old').sort()
+        new = SnapshotSorter(new_file, temp_dir, chunk_rows, max_workers, name='new').sort()
+        fields = [field for field in new.header if field in old.header and field not in ignore]
+
+        def emit(change, domain, **data):
+            counts[change] += 1
+            out.write(json.dumps({'change': change, 'domain': domain, **data}) + '\n')
+
+        old_records = old.records()
+        new_records = new.records()
+        old_item = next(old_records, None)
+        new_item = next(new_records, None)
+        while old_item is not None or new_item is not None:
+            if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+                emit('removed', old_item[0], row=old_item[1])
+                old_item = next(old_records, None)
+            elif old_item is None or new_item[0] < old_item[0]:
+                emit('added', new_item[0], row=new_item[1])
+                new_item = next(new_records, None)
+            else:
+                old_row, new_row = old_item[1], new_item[1]
+                changes = {field: [old_row[field], new_row[field]]
+                           for field in fields if old_row[field] != new_row[field]}
+                if changes:
+                    emit('changed', new_item[0], fields=changes)
+                else:
+                    counts['unchanged'] += 1
+                old_item = next(old_records, None)
+                new_item = next(new_records, None)
+
+        counts['old_rows'] = old.rows
+        counts['new_rows'] = new.rows
+        counts['duplicate_rows'] = old.duplicates + new.duplicates
+        counts['mismatched_rows'] = old.mismatched + new.mismatched
+    return counts
+
+
+def main():
+    """Diff two auction snapshots"""
+    parser = argparse.ArgumentParser(description="Diff two auction CSV snapshots by domain")
+    parser.add_argument('old', help="older snapshot (.csv, .csv.gz or .csv.zst)")
+    parser.add_argument('new', help="newer snapshot")
+    parser.add_argument('-o', '--output', default='-', help="JSON lines output file ('-' for stdout)")
+    parser.add_argument('--chunk-rows', type=int, default=DIFF_CHUNK_ROWS, help="rows per in-memory sort chunk")
+    parser.add_argument('--workers', type=int, default=None, help="processes for the sort phase")
+    parser.add_argument('--ignore', nargs='*', default=None,
+                        help=f"fields to ignore (default: {' '.join(DIFF_IGNORE_FIELDS)})")
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        counts = diff_snapshots(args.old, args.new, out, args.ignore, args.chunk_rows, args.workers)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(counts), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
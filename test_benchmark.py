@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Parser regression tests over the saved page corpus
+Checks that both extractors still produce the recorded output and that
+parsing and CSV writing throughput hasn't fallen below the stored baseline
+"""
+
+import json
+import os
+from bs4 import BeautifulSoup
+from fast_parser import FastExtractor
+from schema import SchemaResolver
+import benchmark
+from config import BENCHMARK_CORPUS_DIR
+
+with open(os.path.join(BENCHMARK_CORPUS_DIR, benchmark.EXPECTED_FILE), 'r', encoding='utf-8') as f:
+    EXPECTED = json.load(f)
+
+
+def test_corpus_output():
+    """Both extractors reproduce the recorded records and totals of every page"""
+    corpus = benchmark.load_corpus()
+    assert set(corpus) == set(EXPECTED)
+    for name, content in corpus.items():
+        assert benchmark.expected_page(content) == EXPECTED[name], name
+
+        fast_extractor = FastExtractor(SchemaResolver())
+        fast = [domain.to_row() + [domain.auction_url] for domain in fast_extractor.extract_domains(content)]
+        assert fast == EXPECTED[name]['records'], name
+        assert fast_extractor.get_total_domains_count(content) == EXPECTED[name]['total_domains'], name
+
+
+def test_edge_cases():
+    """Rows without links, short rows and commented-out rows are handled"""
+    records = {row[0]: row for row in EXPECTED['edge_cases.html']['records']}
+    assert 'commented.com' not in records
+    assert 'short.com' not in records
+    assert records['fish&chips.xyz'][-1] == '/auctions/fish&chips.xyz'
+    assert records['spaced.net'][:2] == ['spaced.net', 'net']
+    assert records['spaced.net'][-1] == ''
+    assert records['nested.io'][-1] == '/auctions/nested.io'
+    assert BeautifulSoup(benchmark.load_corpus()['no_results.html'], 'html.parser').find('table') is None
+    assert EXPECTED['no_results.html'] == {'total_domains': None, 'records': []}
+
+
+def test_throughput_baseline():
+    """No timed operation is slower than the baseline beyond the allowed regression"""
+    baseline = benchmark.load_baseline()
+    assert baseline is not None, "Record a baseline with: python benchmark.py --update-baseline"
+    _, regressions = benchmark.check_baseline(baseline)
+    assert not regressions, regressions
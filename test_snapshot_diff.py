@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Snapshot diff tests
+Diffs small CSV snapshots, including same-named files from different
+directories and files holding rows of an older column layout
+"""
+
+import csv
+import io
+import json
+from config import CSV_HEADERS
+from snapshot_diff import diff_snapshots
+
+
+def _row(index, bid='$5.00'):
+    """CSV row of test domain number index"""
+    return [f"d{index:03d}.com", 'com', '1d 2h', '$1.00', bid, '0', '1 years', '', '', '2026-01-02T03:04:05Z']
+
+
+def _write(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def test_same_named_snapshots(tmp_path):
+    """Snapshots with the same file name in different directories are diffed, not mixed up"""
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    old_file = tmp_path / 'a' / 'porkbun_auctions.csv'
+    new_file = tmp_path / 'b' / 'porkbun_auctions.csv'
+    _write(old_file, CSV_HEADERS, [_row(i) for i in range(15)])
+    _write(new_file, CSV_HEADERS, [_row(i, '$9.00' if i >= 10 else '$5.00') for i in range(5, 20)])
+
+    out = io.StringIO()
+    counts = diff_snapshots(str(old_file), str(new_file), out, chunk_rows=4, max_workers=1)
+    assert {change: counts[change] for change in ('added', 'removed', 'changed', 'unchanged')} == \
+        {'added': 5, 'removed': 5, 'changed': 5, 'unchanged': 5}
+    changes = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert {'change': 'changed', 'domain': 'd010.com', 'fields': {'current_bid': ['$5.00', '$9.00']}} in changes
+
+
+def test_mismatched_rows(tmp_path):
+    """Rows wider than an older file's header are kept and counted"""
+    old_file = tmp_path / 'old.csv'
+    new_file = tmp_path / 'new.csv'
+    _write(old_file, CSV_HEADERS[:-1], [_row(i)[:-1] for i in range(3)] + [_row(i) for i in range(3, 6)])
+    _write(new_file, CSV_HEADERS, [_row(i) for i in range(6)])
+
+    counts = diff_snapshots(str(old_file), str(new_file), io.StringIO(), max_workers=1)
+    assert counts['unchanged'] == 6
+    assert counts['mismatched_rows'] == 3
+
+
+def test_repeated_domains_keep_last_row(tmp_path):
+    """A domain appended again in a later run is compared by its latest row"""
+    old_file = tmp_path / 'old.csv'
+    new_file = tmp_path / 'new.csv'
+    _write(old_file, CSV_HEADERS, [_row(i) for i in range(6)])
+    _write(new_file, CSV_HEADERS, [_row(i) for i in range(6)] + [_row(2, '$9.00'), _row(4, '$7.00')])
+
+    out = io.StringIO()
+    counts = diff_snapshots(str(old_file), str(new_file), out, chunk_rows=3, max_workers=1)
+    assert counts['changed'] == 2 and counts['duplicate_rows'] == 2
+    changes = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert {'change': 'changed', 'domain': 'd002.com', 'fields': {'current_bid': ['$5.00', '$9.00']}} in changes
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Continuous watch mode for Porkbun auctions
+Keeps auctions sorted by end time fresh, refreshing the soonest-ending
+pages every few seconds and far-out pages rarely, within one request budget
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import time
+from datetime import datetime
+from scraper import PorkbunScraper
+from rate_limiter import RateLimiter
+from log_utils import get_logger
+from config import (
+    DOMAINS_PER_PAGE, MAX_PAGES_TO_PROCESS, WATCH_REQUESTS_PER_SECOND,
+    WATCH_REFRESH_TIERS, WATCH_TRACKED_FIELDS, WATCH_OUTPUT_FILE
+)
+
+logger = get_logger(__name__)
+
+
+class RefreshScheduler:
+    """Priority scheduler for page refreshes
+
+    Pages wait in a pending heap keyed by due time. Once due they move to a
+    ready heap keyed by page index, so when the budget can't keep up the
+    soonest-ending pages are always refreshed first. Only the latest entry
+    of each tracked page is live; entries left behind by a discard or
+    reschedule are dropped when reached, so a page is never refreshed twice.
+    """
+
+    def __init__(self, tiers=None):
+        self.tiers = tiers or WATCH_REFRESH_TIERS
+        self.pending = []  # (due_time, page_index, entry)
+        self.ready = []  # (page_index, entry)
+        self.live = {}  # page_index -> its live entry
+        self.entries = itertools.count()
+
+    def interval_for(self, page_index):
+        """Refresh interval for a page, based on its tier"""
+        for pages_up_to, interval in self.tiers:
+            if pages_up_to is None or page_index < pages_up_to:
+                return interval
+        return self.tiers[-1][1]
+
+    def _push(self, page_index, due):
+        entry = next(self.entries)
+        self.live[page_index] = entry
+        heapq.heappush(self.pending, (due, page_index, entry))
+
+    def add(self, page_index, due=None):
+        """Schedule a page that isn't tracked yet"""
+        if page_index in self.live:
+            return
+        self._push(page_index, time.monotonic() if due is None else due)
+
+    def reschedule(self, page_index):
+        """Schedule the next refresh of a page that was just fetched"""
+        self._push(page_index, time.monotonic() + self.interval_for(page_index))
+
+    def discard(self, page_index):
+        """Stop tracking a page (its queued entries are dropped when reached)"""
+        self.live.pop(page_index, None)
+
+    def _promote_due(self):
+        """Move every due page onto the ready heap, dropping stale entries"""
+        now = time.monotonic()
+        while self.pending and self.pending[0][0] <= now:
+            _, page_index, entry = heapq.heappop(self.pending)
+            if self.live.get(page_index) == entry:
+                heapq.heappush(self.ready, (page_index, entry))
+
+    def wait_ready(self):
+        """Block until at least one page is due"""
+        while True:
+            self._promote_due()
+            if self.ready:
+                return
+            if not self.pending:
+                raise RuntimeError("No pages scheduled")
+            time.sleep(max(0.0, self.pending[0][0] - time.monotonic()))
+
+    def pop(self):
+        """Return the highest priority due page, or None if nothing is due"""
+        self._promote_due()
+        while self.ready:
+            page_index, entry = heapq.heappop(self.ready)
+            if self.live.get(page_index) == entry:
+                return page_index
+        return None
+
+    def required_rate(self, total_pages):
+        """Requests per second needed to keep every page on schedule"""
+        return sum(1.0 / self.interval_for(i) for i in range(total_pages))
+
+
+class AuctionWatcher:
+    """Long-running watcher emitting auction updates as they are observed"""
+
+    def __init__(self, requests_per_second=None, max_pages=None, tiers=None,
+                 tracked_fields=None, on_update=None, scraper=None, **search_params):
+        search_params['sortName'] = 'endTime'
+        search_params.setdefault('sortDirection', 'ascending')
+        if scraper is None:
+            self.rate_limiter = RateLimiter(requests_per_second or WATCH_REQUESTS_PER_SECOND)
+            scraper = PorkbunScraper(rate_limiter=self.rate_limiter, **search_params)
+        else:
+            # Requests wait on the given scraper's limiter, so budget against it
+            self.rate_limiter = scraper.rate_limiter
+        self.scraper = scraper
+        self.scheduler = RefreshScheduler(tiers)
+        self.max_pages = min(max_pages or MAX_PAGES_TO_PROCESS, MAX_PAGES_TO_PROCESS)
+        self.tracked_fields = tracked_fields or WATCH_TRACKED_FIELDS
+        self.on_update = on_update or (lambda update: None)
+        self.known = {}  # domain -> tuple of tracked field values
+        self.total_pages = None
+        self.requests_made = 0
+        self.updates_emitted = 0
+        self.running = False
+
+    def _set_total(self, total_domains):
+        """Track the pages that currently exist"""
+        total_pages = min((total_domains + DOMAINS_PER_PAGE - 1) // DOMAINS_PER_PAGE, self.max_pages)
+        if total_pages == self.total_pages:
+            return
+        logger.info("Watching %d pages (%d domains)", total_pages, total_domains)
+        required = self.scheduler.required_rate(total_pages)
+        if required > self.rate_limiter.rate:
+            logger.warning("Schedule needs %.2f req/s but budget is %.2f req/s; far-out pages will refresh late",
+                           required, self.rate_limiter.rate)
+        for page_index in range(1, total_pages):
+            self.scheduler.add(page_index)
+        if self.total_pages is not None:
+            for page_index in range(total_pages, self.total_pages):
+                self.scheduler.discard(page_index)
+        self.total_pages = total_pages
+
+    def _emit_changes(self, domains, page_index):
+        """Emit an update for every new or changed auction on a page"""
+        observed_at = datetime.now().isoformat(timespec='seconds')
+        for domain_data in domains:
+            values = tuple(domain_data.get(field, '') for field in self.tracked_fields)
+            previous = self.known.get(domain_data['domain'])
+            if previous == values:
+                continue
+            self.known[domain_data['domain']] = values
+            update = {
+                'event': 'new' if previous is None else 'changed',
+                'observed_at': observed_at,
+                'page': page_index,
+                'record': domain_data.to_dict(),
+            }
+            if previous is not None:
+                update['changes'] = {
+                    field: [old, new]
+                    for field, old, new in zip(self.tracked_fields, previous, values)
+                    if old != new
+                }
+            self.updates_emitted += 1
+            self.on_update(update)
+
+    def refresh_page(self, page_index):
+        """Fetch one page and emit its updates"""
+        domains, total_domains = self.scraper.scrape_page(page_index * DOMAINS_PER_PAGE)
+        self.requests_made += 1
+        if domains is None:
+            return
+        if page_index == 0 and total_domains:
+            self._set_total(total_domains)
+        self._emit_changes(domains, page_index)
+
+    def run(self, max_requests=None):
+        """Refresh pages until stopped or max_requests have been made"""
+        self.running = True
+        self.scheduler.add(0)
+        while self.running and (max_requests is None or self.requests_made < max_requests):
+            self.scheduler.wait_ready()
+            page_index = self.scheduler.pop()
+            if page_index is None:
+                continue
+            try:
+                self.refresh_page(page_index)
+            except Exception as e:
+                logger.error("Error refreshing page %d: %s", page_index, e,
+                             extra={'offset': page_index * DOMAINS_PER_PAGE, 'error': str(e)})
+            self.scheduler.reschedule(page_index)
+
+    def stop(self):
+        """Stop the watch loop after the current request"""
+        self.running = False
+
+    def get_stats(self):
+        """Get current watch statistics"""
+        return {
+            'requests_made': self.requests_made,
+            'updates_emitted': self.updates_emitted,
+            'domains_tracked': len(self.known),
+            'pages_tracked': self.total_pages,
+        }
+
+
+def main():
+    """Run the watcher until interrupted"""
+    parser = argparse.ArgumentParser(description="Watch Porkbun auctions ending soonest")
+    parser.add_argument('--rate', type=float, default=WATCH_REQUESTS_PER_SECOND,
+                        help="global request budget in requests per second")
+    parser.add_argument('--max-pages', type=int, default=None, help="only watch the first N pages")
+    parser.add_argument('--output', default=WATCH_OUTPUT_FILE,
+                        help="JSON lines file for updates ('-' for stdout)")
+    parser.add_argument('--q', default=None, help="search query")
+    parser.add_argument('--tld', default=None, help="TLD filter")
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+
+    def write_update(update):
+        out.write(json.dumps(update) + '\n')
+        out.flush()
+
+    watcher = AuctionWatcher(requests_per_second=args.rate, max_pages=args.max_pages,
+                             on_update=write_update, q=args.q, tld=args.tld)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n\n⚠ Watch stopped by user")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        print(f"Watch statistics: {watcher.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()